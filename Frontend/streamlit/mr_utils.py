@@ -121,7 +121,26 @@ def parse_mr_filename(filename: str, blob) -> Optional[Dict]:
                 "file_type": extension.upper()
             }
         
-        # Pattern 3: Generic fallback
+        # Pattern 3: {mr-sha}_{source-branch}.md (one document per commit, no timestamp)
+        pattern3 = re.match(r"([a-f0-9]{40})_(.+)\.(md|json)", filename)
+        if pattern3:
+            sha, branch, extension = pattern3.groups()
+            short_sha = sha[:8]
+            created = blob.time_created
+            return {
+                "display_name": f"{short_sha}-{branch}",
+                "sha": sha,
+                "short_sha": short_sha,
+                "branch": branch,
+                "filename": filename,
+                "path": blob.name,
+                "sort_key": created.strftime("%Y%m%d_%H%M%S") if created else filename,
+                "created": created.strftime("%Y-%m-%d") if created else "Unknown",
+                "created_time": created.strftime("%H:%M") if created else "Unknown",
+                "file_type": extension.upper()
+            }
+
+        # Pattern 4: Generic fallback
         sha_match = re.search(r"([a-f0-9]{8,})", filename)
         if sha_match:
             sha = sha_match.group(1)
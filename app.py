@@ -1,9 +1,19 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+import asyncio
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# Load .env once, before any module reads its settings at import time
+load_dotenv()
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic_core import ValidationError
 from controllers.GitlabController import gitlab_router
+from gcs_storage.Utility import init_storage_client
+from common.executors import OFFLOAD_EXECUTOR
 import uvicorn
 import logging
+import anyio
 from exception.exceptions import *
 
 # Logging configuration
@@ -14,133 +24,81 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Upper bound for anyio's worker threads (default is 40)
+THREADPOOL_TOKENS = 200
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Any remaining sync handlers/dependencies run on anyio's threadpool;
+    # raise its limit so they don't cap request concurrency at 40.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_TOKENS
+
+    # asyncio.to_thread uses the loop's default executor, which is capped at
+    # min(32, cpu + 4) workers; give it a pool sized for I/O-bound offloads.
+    asyncio.get_running_loop().set_default_executor(OFFLOAD_EXECUTOR)
+
+    # Build the GCS client once (credential discovery is slow) and share it
+    app.state.storage = init_storage_client()
+    yield
+    app.state.storage.close()
+
+
 # Create FastAPI application instance
 app = FastAPI(
     title="CodeClarity API",
     description="API for GitLab MR documentation generation",
-    version="1.1.0"
+    version="1.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Generic Exception
 @app.exception_handler(Exception)
 def generic_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unexpected error occurred: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"message": "An unexpected error occurred", "details": str(exc)}
     )
     
-# Custom exception
-@app.exception_handler(DuplicateDocumentationError)
-def duplicate_documentation_exception_handler(request: Request, exc: DuplicateDocumentationError):
-    logger.error(f"Duplicate documentation error: {exc}")
-    return JSONResponse(
-        status_code=409,
-        content={"message": "Documentation for this MR already exists", "details": str(exc)}
-    )
-
-@app.exception_handler(InvalidMergeRequest)
-def invalid_merge_request_exception_handler(request: Request, exc: InvalidMergeRequest):
-    logger.error(f"Invalid merge request: {exc}")
-    return JSONResponse(
-        status_code=400,
-        content={"message": "Invalid merge request", 
-                 "details": str(exc)}
-    )
-
-@app.exception_handler(NoCommitsForMRError)
-def no_commits_for_mr_exception_handler(request: Request, exc: NoCommitsForMRError):
-    logger.error(f"No commits found for MR: {exc}")
-    return JSONResponse(
-        status_code=404,
-        content={"message": "No commits found for the specified merge request", 
-                 "details": str(exc)}
-    )
-
-@app.exception_handler(DocumentationGenerationError)
-def documentation_generation_exception_handler(request: Request, exc: DocumentationGenerationError):
-    logger.error(f"Documentation generation error: {exc}")
-    return JSONResponse(
-        status_code=404,
-        content={"message": "Documentation generation failed", 
-                 "details": str(exc)}
-    )
-
-@app.exception_handler(GitlabAPIError)
-def gitlab_api_exception_handler(request: Request, exc: GitlabAPIError):
-    logger.error(f"GitLab API error: {exc}")
-    return JSONResponse(
-        status_code=502,
-        content={"message": "GitLab API error occurred", "details": str(exc)}
-    )
-
-@app.exception_handler(GCSBucketError)
-def gcs_bucket_exception_handler(request: Request, exc: GCSBucketError):
-    logger.error(f"GCS Bucket error: {exc}")
-    return JSONResponse(
-        status_code=500,
-        content={"message": "GCS bucket error occurred", "details": str(exc)}
-    )
-
-@app.exception_handler(GCSUploadError)
-def gcs_upload_exception_handler(request: Request, exc: GCSUploadError):   
-    logger.error(f"GCS Upload error: {exc}")
-    return JSONResponse(
-        status_code=500,
-        content={"message": "GCS upload error occurred", "details": str(exc)}
-    )
-
-@app.exception_handler(MRNotFoundForReleaseError)
-def mr_not_found_for_release_exception_handler(request: Request, exc: MRNotFoundForReleaseError):
-    logger.error(f"MR not found for release error: {exc}")
-    return JSONResponse(
-        status_code=404,
-        content={"message": "No merge request found for the specified release", "details": str(exc)}
+# Custom exceptions carry their own status code and message
+@app.exception_handler(AppError)
+def app_exception_handler(request: Request, exc: AppError):
+    logger.error(f"{type(exc).__name__}: {exc}")
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={"message": exc.message, "details": str(exc)}
     )
 
 @app.exception_handler(ValidationError)
 def validation_exception_handler(request: Request, exc: ValidationError):
     logger.error(f"Validation error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
-        content={"message": "Validation error occurred", "details": exc.errors()}
-    )
-
-@app.exception_handler(BucketNotFound)
-def bucket_not_found_exception_handler(request: Request, exc: BucketNotFound):
-    logger.error(f"Bucket not found error: {exc}")
-    return JSONResponse(
-        status_code=404,
-        content={"message": "Specified storage bucket not found", "details": str(exc)}
-    )
-
-@app.exception_handler(GCSOperationError)
-def gcs_operation_exception_handler(request: Request, exc: GCSOperationError):
-    logger.error(f"GCS operation error: {exc}")
-    return JSONResponse(
-        status_code=500,
-        content={"message": "GCS operation error occurred", "details": str(exc)}
-    )
-
-@app.exception_handler(MRDocumentationNotFoundError)
-def mr_documentation_not_found_exception_handler(request: Request, exc: MRDocumentationNotFoundError):
-    logger.error(f"MR documentation not found error: {exc}")
-    return JSONResponse(
-        status_code=404,
-        content={"message": "No documentation found for the specified merge request", "details": str(exc)}
+        # Raw input (bytes for malformed JSON) and ctx exceptions are not JSON serializable
+        content={
+            "message": "Validation error occurred",
+            "details": exc.errors(include_url=False, include_context=False, include_input=False)
+        }
     )
 
 app.include_router(gitlab_router)
 
+# Probe responses never change, so they are encoded once and served as-is
+ROOT_BODY = b'{"message":"CodeClarity API is running"}'
+HEALTH_BODY = b'{"status":"healthy"}'
+PROBE_HEADERS = {"Cache-Control": "public, max-age=5"}
+
 @app.get("/")
 async def root():
-    logger.info("Root endpoint accessed")
-    return {"message": "CodeClarity API is running"}
+    logger.debug("Root endpoint accessed")
+    return Response(content=ROOT_BODY, media_type="application/json", headers=PROBE_HEADERS)
 
 @app.get("/health")
 async def health_check():
-    logger.info("Health check endpoint accessed")
-    return {"status": "healthy"}
+    logger.debug("Health check endpoint accessed")
+    return Response(content=HEALTH_BODY, media_type="application/json", headers=PROBE_HEADERS)
 
 # This is only needed if you want to run the file directly
 if __name__ == "__main__":
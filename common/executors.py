@@ -0,0 +1,15 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared pool for blocking I/O (GCS, LLM SDKs). Size can be overridden with CC_IO_POOL.
+# Workers spend their time waiting on the network, so the size does not track CPU count.
+IO_POOL_SIZE = int(os.getenv("CC_IO_POOL", 32))
+
+EXECUTOR = ThreadPoolExecutor(max_workers=IO_POOL_SIZE, thread_name_prefix="gcs-io")
+
+# Pool behind asyncio.to_thread. Kept separate from EXECUTOR because offloaded
+# functions fan out onto EXECUTOR themselves; sharing one pool could let the
+# outer calls hold every worker while waiting on their own inner tasks.
+OFFLOAD_POOL_SIZE = int(os.getenv("CC_OFFLOAD_POOL", 64))
+
+OFFLOAD_EXECUTOR = ThreadPoolExecutor(max_workers=OFFLOAD_POOL_SIZE, thread_name_prefix="offload")
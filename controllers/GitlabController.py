@@ -1,8 +1,13 @@
-from datetime import datetime
-from fastapi import APIRouter, HTTPException
+import time
+from typing import Annotated, List
+from pydantic import Field, TypeAdapter, ValidationError
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from models.gitlab.MRDocumentationRequest import MRDocumentationRequest
-from services.gitlab.ReleaseNoteService import process_release_note_from_cicd
-from services.gitlab.MRDocumentationService import process_merge_request_from_cicd
+from models.gitlab.ReleaseNoteRequest import ReleaseNoteRequest
+from exception.exceptions import InvalidMergeRequest
+from services.gitlab.ReleaseNoteService import process_release_note_from_cicd, process_release_notes_batch, stream_release_note_from_cicd
+from services.gitlab.MRDocumentationService import process_merge_request_from_cicd, process_merge_requests_batch
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,22 +15,76 @@ logger = logging.getLogger(__name__)
 
 gitlab_router = APIRouter(prefix="/api/v1", tags=["Documentation"])
 
+# Largest number of MRs accepted in one batch call
+MAX_BATCH_SIZE = 100
+
+MRDocumentationBatch = TypeAdapter(
+    Annotated[List[MRDocumentationRequest], Field(min_length=1, max_length=MAX_BATCH_SIZE)]
+)
+
+ReleaseNoteBatch = TypeAdapter(
+    Annotated[List[ReleaseNoteRequest], Field(min_length=1, max_length=MAX_BATCH_SIZE)]
+)
+
+
+# Validate the raw body straight into the models, skipping the intermediate dict.
+# Invalid MR bodies are reported as InvalidMergeRequest (400), as they always were.
+async def parse_mr_documentation_request(request: Request) -> MRDocumentationRequest:
+    try:
+        return MRDocumentationRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise InvalidMergeRequest(f"Invalid MR request data: {e}") from e
+
+
+async def parse_mr_documentation_batch(request: Request) -> List[MRDocumentationRequest]:
+    try:
+        return MRDocumentationBatch.validate_json(await request.body())
+    except ValidationError as e:
+        raise InvalidMergeRequest(f"Invalid MR request data: {e}") from e
+
+
+async def parse_release_note_request(request: Request) -> ReleaseNoteRequest:
+    return ReleaseNoteRequest.model_validate_json(await request.body())
+
+
+async def parse_release_note_batch(request: Request) -> List[ReleaseNoteRequest]:
+    return ReleaseNoteBatch.validate_json(await request.body())
+
 
 @gitlab_router.post("/generate-mr-documentation")
-def generate_mr_documentation(request: dict):
-    start_time = datetime.now()
-    result = process_merge_request_from_cicd(request)
-    endtime = datetime.now()
-    duration = (endtime - start_time).total_seconds()
-    logger.info(f"MR Documentation generation took {duration} seconds")
+async def generate_mr_documentation(request: MRDocumentationRequest = Depends(parse_mr_documentation_request)):
+    start_time = time.perf_counter()
+    result = await process_merge_request_from_cicd(request)
+    logger.info("MR Documentation generation took %.2f seconds", time.perf_counter() - start_time)
     return {"result": result}
 
 
+@gitlab_router.post("/generate-mr-documentation/batch")
+async def generate_mr_documentation_batch(requests: List[MRDocumentationRequest] = Depends(parse_mr_documentation_batch)):
+    start_time = time.perf_counter()
+    results = await process_merge_requests_batch(requests)
+    logger.info("Batch MR Documentation generation for %s MRs took %.2f seconds", len(requests), time.perf_counter() - start_time)
+    return {"results": results}
+
+
 @gitlab_router.post("/generate-release-note")
-def generate_release_note(request: dict):
-    start_time = datetime.now()
-    result = process_release_note_from_cicd(request)
-    endtime = datetime.now()
-    duration = (endtime - start_time).total_seconds()
-    logger.info(f"Release Note generation took {duration} seconds")
+async def generate_release_note(request: ReleaseNoteRequest = Depends(parse_release_note_request)):
+    start_time = time.perf_counter()
+    result = await process_release_note_from_cicd(request)
+    logger.info("Release Note generation took %.2f seconds", time.perf_counter() - start_time)
     return {"result": result}
+
+
+@gitlab_router.post("/generate-release-note/batch")
+async def generate_release_note_batch(requests: List[ReleaseNoteRequest] = Depends(parse_release_note_batch)):
+    start_time = time.perf_counter()
+    results = await process_release_notes_batch(requests)
+    logger.info("Batch Release Note generation for %s releases took %.2f seconds", len(requests), time.perf_counter() - start_time)
+    return {"results": results}
+
+
+# Streams the note as it is generated; it is stored once the stream completes
+@gitlab_router.post("/generate-release-note/stream")
+async def generate_release_note_stream(request: ReleaseNoteRequest = Depends(parse_release_note_request)):
+    release_note = await stream_release_note_from_cicd(request)
+    return StreamingResponse(release_note, media_type="text/plain")
@@ -1,54 +1,65 @@
-class DuplicateDocumentationError(Exception):
-    """Raised when documentation already exists."""
+class AppError(Exception):
+    """Base class for errors that map to an API error response."""
+    status_code = 500
+    message = "An unexpected error occurred"
 
-# class BucketNotFound(Exception):
-#     """Raised when the specified storage bucket is not found."""
+class DuplicateDocumentationError(AppError):
+    """Raised when documentation for a commit already exists."""
+    status_code = 409
+    message = "Documentation for this MR already exists"
 
-class InvalidMergeRequest(Exception):
+class InvalidMergeRequest(AppError):
     """Raised for invalid merge request or release."""
+    status_code = 400
+    message = "Invalid merge request"
 
-class MRNotFoundForReleaseError(Exception):
+class MRNotFoundForReleaseError(AppError):
     """Raised when no merge request is found for a release."""
-    pass
+    status_code = 404
+    message = "No merge request found for the specified release"
 
-class MRDocumentationNotFoundError(Exception):
+class MRDocumentationNotFoundError(AppError):
     """Raised when no documentation is found for a merge request."""
-    pass
+    status_code = 404
+    message = "No documentation found for the specified merge request"
 
 # class FailedToFetchCommits(Exception):
 #     """Raised when commits could not be fetched."""
 
-class NoCommitsForMRError(Exception):
+class NoCommitsForMRError(AppError):
     """Raised when there are no commits for a merge request."""
+    status_code = 404
+    message = "No commits found for the specified merge request"
 
 # class FailedToFetchCommitDiff(Exception):
 #     """Raised when failing to fetch a commit's diff."""
 
-class DocumentationGenerationError(Exception):
+class DocumentationGenerationError(AppError):
     """Raised when documentation generation fails."""
+    status_code = 404
+    message = "Documentation generation failed"
 
-class GitlabAPIError(Exception):
+class GitlabAPIError(AppError):
     """Raised for general GitLab API errors."""
-    pass
+    status_code = 502
+    message = "GitLab API error occurred"
 
-class GCSBucketError(Exception):
+class GCSBucketError(AppError):
     """Raised for errors related to GCS bucket access or creation."""
-    pass
-
-class GCSUploadError(Exception):
-    """Raised for errors during the file upload process."""
-    pass
-
-class DuplicateDocumentationError(Exception):
-    """Raised when documentation for a commit already exists."""
-    pass
-
-#ValidationError
+    status_code = 500
+    message = "GCS bucket error occurred"
 
 class BucketNotFound(GCSBucketError):
     """Raised when the specified storage bucket is not found."""
-    pass
+    status_code = 404
+    message = "Specified storage bucket not found"
+
+class GCSUploadError(AppError):
+    """Raised for errors during the file upload process."""
+    status_code = 500
+    message = "GCS upload error occurred"
 
-class GCSOperationError(Exception):
+class GCSOperationError(AppError):
     """Base exception for general GCS operations."""
-    pass
\ No newline at end of file
+    status_code = 500
+    message = "GCS operation error occurred"
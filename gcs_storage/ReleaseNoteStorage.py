@@ -1,155 +1,260 @@
-from typing import Dict, List, Set
-from google.cloud import storage
+import asyncio
+import contextlib
+from typing import Dict, List, Optional, Set, Tuple
 from google.cloud.exceptions import NotFound
-from dotenv import load_dotenv
+from common.executors import EXECUTOR
 from exception.exceptions import BucketNotFound, GCSOperationError, MRDocumentationNotFoundError
 from models.gitlab.ReleaseNoteRequest import ReleaseNoteRequest
+from llm_analysis.token_budget import count_tokens, get_encoding
 from gcs_storage.Utility import (
+    get_storage_client,
     get_documents_sha,
+    scan_current_release,
     extract_sha_from_filename,
+    bucket_exists,
+    blob_timestamp,
+    unique_suffix,
+    get_cached_documents_sha,
+    cache_documents_sha,
+    invalidate_documents_sha,
 )
-import datetime
 import logging
 from google.api_core import exceptions as gcs_exceptions
 from exception.exceptions import GCSBucketError, GCSUploadError, DuplicateDocumentationError
 
 logger = logging.getLogger(__name__)
-load_dotenv()
 
+# GCS accepts at most 100 calls in one batch request
+_BATCH_LIMIT = 100
 
+# One in-flight listing per bucket; concurrent release requests wait and reuse it.
+# Each entry counts its users and is dropped by the last one, so the map only
+# holds buckets with a listing in flight.
+_SHA_LOOKUP_LOCKS: Dict[str, Tuple[asyncio.Lock, int]] = {}
 
-def get_MR_documentation_sha_from_bucket(request: ReleaseNoteRequest):
-    """Get all MR SHAs that have documentation in the bucket."""
-    bucket_name = f"{request.project_id}-{request.project_name}"
-    storage_client = storage.Client()
 
+@contextlib.asynccontextmanager
+async def _sha_lookup_lock(bucket_name: str):
+    """Hold the bucket's listing lock, forgetting it once nobody holds or waits on it"""
+    lock, users = _SHA_LOOKUP_LOCKS.get(bucket_name, (None, 0))
+    lock = lock or asyncio.Lock()
+    _SHA_LOOKUP_LOCKS[bucket_name] = (lock, users + 1)
     try:
-        bucket = storage_client.bucket(bucket_name)
-        if not bucket.exists():
-            raise BucketNotFound(f"Bucket '{bucket_name}' not found.")
+        async with lock:
+            yield
+    finally:
+        _, users = _SHA_LOOKUP_LOCKS[bucket_name]
+        if users == 1:
+            del _SHA_LOOKUP_LOCKS[bucket_name]
+        else:
+            _SHA_LOOKUP_LOCKS[bucket_name] = (lock, users - 1)
 
-        mr_sha = get_documents_sha(bucket)
-        if not mr_sha:
-            raise MRDocumentationNotFoundError(f"No MR documentation found in bucket {bucket_name}")
 
-        return mr_sha
-    except gcs_exceptions.Forbidden as e:
+async def get_MR_documentation_sha_from_bucket(request: ReleaseNoteRequest):
+    """
+    Get all MR SHAs that have documentation in the bucket.
+
+    Returns:
+        A (bucket, mr_sha) tuple so callers can reuse the bucket handle;
+        mr_sha maps each documented SHA to its blob names.
+    """
+    bucket_name = f"{request.project_id}-{request.project_name}"
+    bucket = get_storage_client().bucket(bucket_name)
+
+    cached_sha = get_cached_documents_sha(bucket_name)
+    if cached_sha is not None:
+        return bucket, cached_sha
+
+    async with _sha_lookup_lock(bucket_name):
+        # A concurrent caller may have filled the cache while we waited
+        cached_sha = get_cached_documents_sha(bucket_name)
+        if cached_sha is not None:
+            return bucket, cached_sha
+
+        mr_sha = await _list_documented_sha(bucket)
+        cache_documents_sha(bucket_name, mr_sha)
+        return bucket, mr_sha
+
+
+async def _list_documented_sha(bucket):
+    """List current_release/ and probe the bucket, mapping GCS errors to app errors"""
+    bucket_name = bucket.name
+    try:
+        # The existence probe and the listing are independent round-trips
+        async with asyncio.TaskGroup() as tg:
+            exists_task = tg.create_task(asyncio.to_thread(bucket_exists, bucket))
+            sha_task = tg.create_task(asyncio.to_thread(get_documents_sha, bucket))
+    except* gcs_exceptions.NotFound as e:
+        # Listing a missing bucket fails before the probe can report it
+        raise BucketNotFound(f"Bucket '{bucket_name}' not found.") from e
+    except* gcs_exceptions.Forbidden as e:
         raise GCSBucketError(f"Permission denied for GCS bucket '{bucket_name}'.") from e
-    except gcs_exceptions.GoogleAPICallError as e:
-        raise GCSOperationError(f"A GCS API error occurred: {e}") from e
+    except* gcs_exceptions.GoogleAPICallError as e:
+        raise GCSOperationError(f"A GCS API error occurred: {e.exceptions[0]}") from e
+
+    if not exists_task.result():
+        raise BucketNotFound(f"Bucket '{bucket_name}' not found.")
 
+    mr_sha = sha_task.result()
+    if not mr_sha:
+        raise MRDocumentationNotFoundError(f"No MR documentation found in bucket {bucket_name}")
 
-def get_MR_documentation(release_note_request: ReleaseNoteRequest, mr_in_release: set):
+    return mr_sha
+
+
+async def get_MR_documentation(release_note_request: ReleaseNoteRequest, mr_in_release: set):
     """Get documentation for MRs that are both in release and have documentation."""
+    if not mr_in_release:
+        # Nothing can intersect, so skip the bucket probe and listing
+        raise MRDocumentationNotFoundError(f"No matching documentation found for release '{release_note_request.release_tag}'")
+
     try:
-        mr_in_gcs = get_MR_documentation_sha_from_bucket(release_note_request)
+        bucket, mr_in_gcs = await get_MR_documentation_sha_from_bucket(release_note_request)
         common_sha = mr_in_release.intersection(mr_in_gcs)
 
         if not common_sha:
             raise MRDocumentationNotFoundError(f"No matching documentation found for release '{release_note_request.release_tag}'")
 
-        storage_client = storage.Client()
-        bucket_name = f"{release_note_request.project_id}-{release_note_request.project_name}"
-        bucket = storage_client.bucket(bucket_name)
-
-        return get_MR_documentation_from_bucket(bucket, common_sha)
+        # The scan already named the blobs, so download them without listing again
+        targets = [(sha, name) for sha in common_sha for name in mr_in_gcs[sha]]
+        return await asyncio.to_thread(get_MR_documentation_from_bucket, bucket, targets)
     except MRDocumentationNotFoundError as e:
         raise
 
-def get_MR_documentation_from_bucket(bucket, common_sha: set):
-    """Get documentation content from bucket for specific SHAs."""
+def get_MR_documentation_from_bucket(bucket, targets: List[Tuple[str, str]]):
+    """Get documentation content from bucket for (sha, blob name) targets."""
     documents = []
     try:
-        blobs = bucket.list_blobs(prefix="current_release/")
-        for blob in blobs:
-            blob_sha = extract_sha_from_filename(blob.name)
-            if blob_sha and blob_sha in common_sha:
-                content = blob.download_as_text()
-                documents.append({
-                        "sha": blob_sha,
-                        "filename": blob.name.split("/")[-1],
-                        "content": content,
-                        "token_count": estimate_tokens(content),
-                    })
+        contents = list(EXECUTOR.map(lambda target: bucket.blob(target[1]).download_as_text(), targets))
+
+        # Tokenize all documents in one call; tiktoken releases the GIL across threads
+        encoded = get_encoding().encode_batch(contents, num_threads=8, disallowed_special=())
+        for (blob_sha, blob_name), content, tokens in zip(targets, contents, encoded):
+            documents.append({
+                    "sha": blob_sha,
+                    "path": blob_name,
+                    "filename": blob_name.rpartition("/")[2],
+                    "content": content,
+                    "token_count": len(tokens),
+                })
         return format_for_llm(documents)
     except gcs_exceptions.GoogleAPICallError as e:
         raise GCSOperationError(f"Failed to download documentation from GCS: {e}") from e
 
 
 
-def upload_release_note(request: ReleaseNoteRequest, release_note: str, mr_sha: list):
-    """Uploads the final release note and moves related MR docs."""
-    storage_client = storage.Client()
+async def upload_release_note(request: ReleaseNoteRequest, release_note: str, mr_sha: list, blob_names: Optional[List[str]] = None):
+    """
+    Uploads the final release note and moves related MR docs.
+
+    blob_names are the MR documents used for the note; when given, the
+    move skips listing current_release/ again.
+    """
     bucket_name = f"{request.project_id}-{request.project_name}"
-    bucket = storage_client.bucket(bucket_name)
+    bucket = get_storage_client().bucket(bucket_name)
+
+    # The note and the moved docs live under different prefixes, so write the
+    # note while the docs are being moved
+    file_path, moved = await asyncio.gather(
+        asyncio.to_thread(_upload_release_note_blob, bucket, request, release_note),
+        _move_release_documentation(bucket, request, mr_sha, blob_names),
+        return_exceptions=True,
+    )
+
+    if isinstance(file_path, BaseException):
+        # Put the docs back so a retry for this release can still find them
+        if isinstance(moved, dict) and moved:
+            await _run_moves(bucket, [(dest, src) for src, dest in moved.items()])
+            invalidate_documents_sha(bucket_name)
+        raise file_path
+
+    # This part is non-critical, so its failure should only be logged as a warning.
+    if isinstance(moved, BaseException):
+        logger.warning(f"Non-critical error: Failed to move MR documentation. Reason: {moved}")
+
+    return f"gs://{bucket_name}/{file_path}"
+
+
+async def _move_release_documentation(bucket, request: ReleaseNoteRequest, mr_sha: list, blob_names: Optional[List[str]]):
+    """Move the release's MR docs out of current_release/; returns source -> destination."""
+    if not mr_sha:
+        return {}
+    if blob_names is None:
+        blob_names = [name for name, _ in await asyncio.to_thread(scan_current_release, bucket)]
+    if not blob_names:
+        return {}
+
+    destination_folder = f"releases/{request.release_tag}/mr_docs/"
+    moved = await move_mr_documentation(bucket.name, blob_names, destination_folder, mr_sha)
+    invalidate_documents_sha(bucket.name)
+    return moved
 
-    try:
-        if not bucket.exists():
-            logger.info(f"Bucket {bucket_name} not found, creating it.")
-            # storage_client.create_bucket(bucket)
 
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        blob_name = f"{timestamp}_release-note_{request.release_tag}.md"
+def _upload_release_note_blob(bucket, request: ReleaseNoteRequest, release_note: str) -> str:
+    """Write the release note under releases/<tag>/ and return its object path."""
+    bucket_name = bucket.name
+    try:
+        timestamp = blob_timestamp()
+        blob_name = f"{timestamp}_{unique_suffix()}_release-note_{request.release_tag}.md"
         file_path = f"releases/{request.release_tag}/{blob_name}"
         blob = bucket.blob(file_path)
-        blob.upload_from_string(release_note, content_type='text/markdown')
+        # Notes are small, so this is a single multipart request; crc32c is
+        # GCS's native checksum and cheaper than computing MD5 as well
+        blob.upload_from_string(
+            release_note, content_type='text/markdown', checksum="crc32c", if_generation_match=0
+        )
 
         logger.info(f"Release note uploaded to: gs://{bucket_name}/{file_path}")
+        return file_path
 
     except gcs_exceptions.Forbidden as e:
         raise GCSBucketError(f"Permission denied for GCS bucket '{bucket_name}'.") from e
     except gcs_exceptions.GoogleAPICallError as e:
         raise GCSUploadError(f"GCS error during release note upload: {e}") from e
 
-    # This part is non-critical, so its failure should only be logged as a warning.
-    try:
-        blobs = bucket.list_blobs(prefix="current_release/")
-        blob_names = [b.name for b in blobs if not b.name.endswith('/')]
-        if blob_names:
-            destination_folder = f"releases/{request.release_tag}/mr_docs/"
-            move_mr_documentation(bucket_name, blob_names, destination_folder, mr_sha)
-    except Exception as e:
-        logger.warning(f"Non-critical error: Failed to move MR documentation. Reason: {e}")
-
-    return f"gs://{bucket_name}/{file_path}"
-        
-
 
 def format_for_llm(documents):
     """Format documents for optimal LLM processing"""
     if not documents:
-        return {"formatted_text": "", "total_documents": 0, "estimated_tokens": 0}
-
-    formatted_text = "# Merge Request Documentation for Release\n\n"
-
-    for i, doc in enumerate(documents, 1):
-        formatted_text += f"""## Document {i}: {doc['filename']}
-                **SHA:** {doc['sha']}
-                **Content:**
-                {doc['content']}
-
-                ---
-
-            """
-
-    total_tokens = sum(doc["token_count"] for doc in documents)
+        return {"formatted_text": "", "total_documents": 0, "blob_names": [], "estimated_tokens": 0}
+
+    # MRs whose documentation is identical apart from whitespace (cherry-picks,
+    # bot MRs) are sent once, listing every SHA, instead of paying for each copy
+    groups = {}
+    for doc in documents:
+        groups.setdefault(" ".join(doc['content'].split()), []).append(doc)
+
+    parts = ["# Merge Request Documentation for Release\n\n"]
+    total_tokens = 0
+    for i, group in enumerate(groups.values(), 1):
+        doc = group[0]
+        parts.append(
+            f"## Document {i}: {doc['filename']}\n"
+            f"**SHA:** {', '.join(member['sha'] for member in group)}\n"
+            "**Content:**\n"
+            f"{doc['content']}\n\n"
+            "---\n\n"
+        )
+        total_tokens += doc["token_count"]
+    formatted_text = "".join(parts)
 
     return {
         "formatted_text": formatted_text,
         "total_documents": len(documents),
+        "blob_names": [doc["path"] for doc in documents],
         # "documents": documents,  # Keep structured data for reference
         "estimated_tokens": total_tokens,
     }
 
 
 def estimate_tokens(text):
-    """Rough token estimation (1 token ≈ 4 characters for English)"""
-    return len(text) // 4 if text else 0
+    """Count tokens using the cl100k_base BPE encoding"""
+    return count_tokens(text)
 
 
 
 
-def move_mr_documentation(bucket_name: str, blob_names: List[str], destination_folder: str, mr_sha: List[str]) -> Dict[str, str]:
+async def move_mr_documentation(bucket_name: str, blob_names: List[str], destination_folder: str, mr_sha: List[str]) -> Dict[str, str]:
     """
     Atomically and efficiently moves blobs listed in mr_sha to a destination folder.
 
@@ -161,53 +266,126 @@ def move_mr_documentation(bucket_name: str, blob_names: List[str], destination_f
     Returns:
         A dictionary mapping original blob names to new blob names.
     """
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
+    if not mr_sha or not blob_names:
+        return {}
+
+    bucket = get_storage_client().bucket(bucket_name)
 
-    if destination_folder and not destination_folder.endswith('/'):
-        destination_folder += '/'
+    if destination_folder:
+        destination_folder = destination_folder.rstrip('/') + '/'
 
-    # --- OPTIMIZATION: Convert the list to a set for fast lookups ---
+    # Index the release SHAs so each blob is a single set lookup
     shas_to_move: Set[str] = set(mr_sha)
 
+    # Pair up every blob whose SHA is part of the release with its destination
+    moves = []
+    for source_blob_name in blob_names:
+        sha = extract_sha_from_filename(source_blob_name)
+        if sha is None or sha not in shas_to_move:
+            continue
+        filename = source_blob_name.rpartition('/')[2]
+        moves.append((source_blob_name, f"{destination_folder}{filename}"))
+
+    return await _run_moves(bucket, moves)
+
+
+async def _run_moves(bucket, moves: List[Tuple[str, str]]) -> Dict[str, str]:
+    """Apply (source, destination) renames and return the ones that succeeded."""
     moved_blobs = {}
     failed_moves = {}
 
-    for source_blob_name in blob_names:
-        # --- Use the fast set for the check ---
-        if not any(sha in source_blob_name for sha in shas_to_move):
-            continue
+    # A rename is a COPY plus a DELETE; group them into batch requests and
+    # run the chunks in parallel
+    loop = asyncio.get_running_loop()
+    chunks = [moves[i:i + _BATCH_LIMIT] for i in range(0, len(moves), _BATCH_LIMIT)]
+    results = await asyncio.gather(
+        *(loop.run_in_executor(EXECUTOR, _move_chunk, bucket, chunk) for chunk in chunks)
+    )
+    for chunk_result in results:
+        for source_blob_name, destination_blob_name, error in chunk_result:
+            if error:
+                failed_moves[source_blob_name] = error
+            else:
+                moved_blobs[source_blob_name] = destination_blob_name
 
-        try:
-            filename = source_blob_name.split('/')[-1]
-            destination_blob_name = destination_folder + filename
+    if failed_moves:
+        logger.warning(f"Batch move summary: {len(moved_blobs)} succeeded, {len(failed_moves)} failed.")
 
-            # No need to check for source == destination here, as we are
-            # moving from a 'current_release' folder to a tagged release folder.
-            
-            source_blob = bucket.blob(source_blob_name)
+    return moved_blobs
 
-            # Atomically rename the blob
-            new_blob = bucket.rename_blob(source_blob, destination_blob_name)
 
-            moved_blobs[source_blob_name] = new_blob.name
-            print(f"✅ Successfully moved: {source_blob_name} -> {new_blob.name}")
+def _move_chunk(bucket, moves: List[Tuple[str, str]]):
+    """
+    Move up to _BATCH_LIMIT blobs with one batched COPY and one batched DELETE request.
 
-        except NotFound:
-            # Gracefully handle the case where another process already moved the blob
-            dest_blob = bucket.blob(destination_blob_name)
-            if dest_blob.exists():
-                print(f"⏭️ Skipping {source_blob_name}: already moved by another process.")
-                moved_blobs[source_blob_name] = destination_blob_name
-            else:
-                failed_moves[source_blob_name] = "Source blob not found."
-                print(f"❌ Failed to move {source_blob_name}: Source not found.")
+    If any copy in the batch fails (typically a blob another process already
+    moved), the chunk is retried blob by blob so each failure is reported on
+    its own. Copies that already landed are simply overwritten.
 
-        except Exception as e:
-            failed_moves[source_blob_name] = str(e)
-            raise GCSOperationError(f"Failed to move blob {source_blob_name} to {destination_blob_name}: {e}") from e
+    Returns:
+        A list of (source, destination, error) tuples; error is None on success.
+    """
+    bucket_blob = bucket.blob
+    try:
+        with bucket.client.batch():
+            for source_blob_name, destination_blob_name in moves:
+                bucket.copy_blob(bucket_blob(source_blob_name), bucket, new_name=destination_blob_name)
+    except gcs_exceptions.GoogleAPICallError as e:
+        logger.debug("Batched copy failed, moving blobs one by one: %s", e)
+        return [_move_blob_or_fail(bucket, *move) for move in moves]
 
-    if failed_moves:
-        logger.info(f"\nBatch move summary: {len(moved_blobs)} succeeded, {len(failed_moves)} failed.")
+    try:
+        with bucket.client.batch():
+            for source_blob_name, _ in moves:
+                bucket_blob(source_blob_name).delete()
+    except gcs_exceptions.GoogleAPICallError as e:
+        logger.debug("Batched delete failed, deleting sources one by one: %s", e)
+        for source_blob_name, _ in moves:
+            try:
+                bucket_blob(source_blob_name).delete()
+            except NotFound:
+                pass
+
+    for source_blob_name, destination_blob_name in moves:
+        logger.debug("Moved %s -> %s", source_blob_name, destination_blob_name)
+    return [(source_blob_name, destination_blob_name, None) for source_blob_name, destination_blob_name in moves]
+
+
+def _move_blob_or_fail(bucket, source_blob_name: str, destination_blob_name: str):
+    """Rename one blob, turning a hard failure into an error entry"""
+    try:
+        return _move_blob(bucket, source_blob_name, destination_blob_name)
+    except GCSOperationError as e:
+        return source_blob_name, None, str(e)
+
+
+def _move_blob(bucket, source_blob_name: str, destination_blob_name: str):
+    """
+    Rename a single blob.
 
-    return moved_blobs
\ No newline at end of file
+    Returns:
+        A (source, destination, error) tuple; error is None on success.
+    """
+    try:
+        # No need to check for source == destination here, as we are
+        # moving from a 'current_release' folder to a tagged release folder.
+        source_blob = bucket.blob(source_blob_name)
+
+        # Atomically rename the blob
+        new_blob = bucket.rename_blob(source_blob, destination_blob_name)
+
+        logger.debug("Moved %s -> %s", source_blob_name, new_blob.name)
+        return source_blob_name, new_blob.name, None
+
+    except NotFound:
+        # Gracefully handle the case where another process already moved the blob
+        dest_blob = bucket.blob(destination_blob_name)
+        if dest_blob.exists():
+            logger.debug("Skipping %s: already moved by another process", source_blob_name)
+            return source_blob_name, destination_blob_name, None
+
+        logger.debug("Failed to move %s: source not found", source_blob_name)
+        return source_blob_name, None, "Source blob not found."
+
+    except Exception as e:
+        raise GCSOperationError(f"Failed to move blob {source_blob_name} to {destination_blob_name}: {e}") from e
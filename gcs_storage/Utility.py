@@ -1,33 +1,134 @@
 import re
+import time
+import uuid
 import asyncio
+import threading
+import functools
+from typing import Dict, List, Optional, Tuple
+from cachetools import TTLCache
 from google.cloud import storage
-from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+# Process-wide GCS client, created at app startup (or lazily on first use)
+_storage_client = None
+_storage_client_lock = threading.Lock()
+
+# Keep-alive connections per host, sized for concurrent worker threads
+_HTTP_POOL_SIZE = 50
+
+# Buckets already seen to exist; lets hot paths skip the metadata round-trip
+_KNOWN_BUCKETS = TTLCache(maxsize=128, ttl=3600)
+_KNOWN_BUCKETS_LOCK = threading.Lock()
+
+# SHA -> blob names under current_release/, per bucket. Kept briefly since uploads change it.
+_DOCUMENTED_SHA_CACHE = TTLCache(maxsize=64, ttl=60)
+_DOCUMENTED_SHA_LOCK = threading.Lock()
+
+# Largest page the JSON API returns for object listings
+_LIST_PAGE_SIZE = 1000
+
+# A full 40-character commit SHA, not part of a longer hex run
+_SHA_RE = re.compile(r'(?<![a-f0-9])[a-f0-9]{40}(?![a-f0-9])')
+
+
+def init_storage_client() -> storage.Client:
+    """Create the shared GCS client; called once from the app lifespan"""
+    global _storage_client
+    with _storage_client_lock:
+        if _storage_client is None:
+            client = storage.Client()
+            # The default pool holds 10 connections, fewer than our worker threads
+            client._http.mount(
+                "https://", HTTPAdapter(pool_connections=_HTTP_POOL_SIZE, pool_maxsize=_HTTP_POOL_SIZE)
+            )
+            _storage_client = client
+        return _storage_client
+
+
+def get_storage_client() -> storage.Client:
+    """Return the shared GCS client, creating it if startup has not run"""
+    if _storage_client is None:
+        return init_storage_client()
+    return _storage_client
 
 
 def extract_sha_from_filename(filename: str):
     """Extract SHA from filename with format: timestamp_sha_branch"""
-    # Get just the filename without path and extension
-    base_filename = filename.split('/')[-1].replace('.md', '')
-    
-    # Split by underscore - format: timestamp_sha_branch
-    parts = base_filename.split('_')
-    
-    # The SHA should be the middle part (40 characters)
-    for part in parts:
-        if len(part) == 40 and re.match(r'^[a-f0-9]{40}$', part):
-            return part
-    return None
-
-def get_documents_sha(bucket):
-    """Get all commit SHAs from the current_release folder in the bucket"""
-
-    mr_sha = set()
-    blobs = bucket.list_blobs(prefix="current_release/")
-    for blob in blobs:
-        # Extract SHA from blob name
-        sha = extract_sha_from_filename(blob.name)
+    # One scan over the whole name; the per-SHA folder holds the same value
+    match = _SHA_RE.search(filename)
+    return match.group(0) if match else None
+
+
+def scan_current_release(bucket) -> List[Tuple[str, Optional[str]]]:
+    """List current_release/ once, pairing each blob name with its commit SHA"""
+    # Only names are needed, so ask GCS to leave out the rest of the metadata
+    blobs = bucket.list_blobs(
+        prefix="current_release/", fields="items(name),nextPageToken", page_size=_LIST_PAGE_SIZE
+    )
+    return [
+        (blob.name, extract_sha_from_filename(blob.name))
+        for page in blobs.pages
+        for blob in page
+        if not blob.name.endswith('/')
+    ]
+
+
+def get_documents_sha(bucket) -> Dict[str, List[str]]:
+    """Get all commit SHAs from the current_release folder, mapped to their blob names"""
+    documents: Dict[str, List[str]] = {}
+    for name, sha in scan_current_release(bucket):
         if sha:  # Only add if SHA is not None
-            mr_sha.add(sha)
-        print(f"Found blob: {blob.name}")
-    return mr_sha
+            documents.setdefault(sha, []).append(name)
+    return documents
+
+
+def get_cached_documents_sha(bucket_name: str):
+    """Return the cached SHA index for a bucket, or None if it is not cached"""
+    with _DOCUMENTED_SHA_LOCK:
+        return _DOCUMENTED_SHA_CACHE.get(bucket_name)
+
+
+def cache_documents_sha(bucket_name: str, documents: Dict[str, List[str]]):
+    """Cache the SHA index found in a bucket's current_release folder"""
+    with _DOCUMENTED_SHA_LOCK:
+        _DOCUMENTED_SHA_CACHE[bucket_name] = documents
+
+
+def invalidate_documents_sha(bucket_name: str):
+    """Drop the cached SHA index after current_release contents change"""
+    with _DOCUMENTED_SHA_LOCK:
+        _DOCUMENTED_SHA_CACHE.pop(bucket_name, None)
+
+
+def remember_bucket(bucket_name: str):
+    """Record that a bucket exists so later checks skip the GCS lookup"""
+    with _KNOWN_BUCKETS_LOCK:
+        _KNOWN_BUCKETS[bucket_name] = True
+
+
+def bucket_exists(bucket) -> bool:
+    """Check whether a bucket exists, caching positive answers for an hour"""
+    with _KNOWN_BUCKETS_LOCK:
+        if bucket.name in _KNOWN_BUCKETS:
+            return True
+
+    if not bucket.exists():
+        return False
+
+    remember_bucket(bucket.name)
+    return True
+
+
+@functools.lru_cache(maxsize=1)
+def _timestamp_for(epoch_seconds: int) -> str:
+    return time.strftime("%Y%m%d_%H%M%S", time.gmtime(epoch_seconds))
+
+
+def blob_timestamp() -> str:
+    """UTC timestamp (YYYYMMDD_HHMMSS) used to prefix uploaded blob names"""
+    return _timestamp_for(int(time.time()))
+
 
+def unique_suffix() -> str:
+    """Short random token that keeps same-second uploads from sharing a name"""
+    return uuid.uuid4().hex[:8]
@@ -1,176 +1,94 @@
 from __future__ import annotations
-from langchain.prompts import PromptTemplate
+from langchain.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 from langchain_core.exceptions import LangChainException
-from groq import APIError as GroqAPIError
-from dotenv import load_dotenv
-from httpx import Client
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from groq import APIConnectionError, APIError as GroqAPIError, AsyncGroq, InternalServerError, RateLimitError
+from httpx import AsyncClient, Client, Limits, Timeout, TransportError
+from tenacity import before_sleep_log, retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from tenacity.wait import wait_base
+import asyncio
+import atexit
+import functools
+import json
 import os
 
-from pyparsing import Optional
+from typing import Optional
 from models.gitlab.MRDocumentationRequest import MRDocumentationRequest
 from models.gitlab.ReleaseNoteRequest import ReleaseNoteRequest
 import logging
 from exception.exceptions import *
-from groq import Groq
 
 from models.jira_model import JiraTicket
+from llm_analysis.response_cache import cache_response, canonical_labels, canonical_text, deduplicated_copy, documentation_cache_key, get_cached_response, single_flight
+from llm_analysis.token_budget import (
+    CONTEXT_TOKEN_LIMIT, MR_DIFF_TOKEN_BUDGET, RELEASE_DOCS_TOKEN_BUDGET, count_tokens, fit_to_token_budget
+)
 
 
 logger = logging.getLogger(__name__)
 
-load_dotenv()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+@functools.lru_cache(maxsize=1)
+def get_settings() -> dict:
+    """Read Groq settings once; app.py loads .env before any module is imported"""
+    return {"groq_api_key": os.environ["GROQ_API_KEY"]}
 
-def generate_documentation_with_llm(formatted_llm_data: str, request, jira_ticket_data: Optional[JiraTicket] = None):
-    """
-    Generate documentation using LLM based on formatted commit data.
-    This function prepares the prompt and calls the LLM to generate documentation.
-    """
 
-    try:
-        if isinstance(request, MRDocumentationRequest):
-
-            # Setup LLM with MR context
-            llm_mr = setup_llm_mr_gitlab()
-            # Build Jira context (handles missing data gracefully)
-            jira_context = build_jira_context(jira_ticket_data) if jira_ticket_data else "[No Jira ticket linked]"
-            # Prepare the prompt with necessary data
-            response = llm_mr.invoke(
-        {
-            "mr_title": request.title,
-            "mr_author": request.author,
-            "merged_by": request.merged_by,
-            "labels": request.labels,
-            "mr_description": request.description,
-            "jira_context": jira_context,
-            "formatted_commit_data": formatted_llm_data
-        }
-    )
+# One keep-alive pool for every Groq call, so each MR reuses warm connections
+# instead of paying a new TCP + TLS handshake; a release fans out many at once
+HTTP_LIMITS = Limits(max_connections=100, max_keepalive_connections=40, keepalive_expiry=30.0)
+HTTP_TIMEOUT = Timeout(connect=5.0, read=60.0, write=10.0, pool=5.0)
+HTTP_HEADERS = {"Accept-Encoding": "gzip, br"}
 
-            
-        
-            if hasattr(response, "content"):
-                mr_documentation = response.content
-            elif hasattr(response, "text"):
-                mr_documentation = response.text
-            else:
-                mr_documentation = str(response)
-            
-            logger.info("MR Documentation generated successfully")
-            
-            # Extract detailed token usage
-            token_info = {
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "total_tokens": 0
-            }
-        
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                token_info = {
-                    "input_tokens": response.usage_metadata['input_tokens'],
-                    "output_tokens": response.usage_metadata['output_tokens'],
-                    "total_tokens": response.usage_metadata['total_tokens']
-                }
-
-            # print(f"Generated MR Documentation:")
-            
-            return {
-                "mr_documentation": mr_documentation,
-                "token_usage": token_info,
-                "model_used": response.response_metadata['model_name'],
-                "generation_successful": True
-            }
-
-        elif isinstance(request, ReleaseNoteRequest):
-            # Setup LLM with Release Note context
-            llm_release =  setup_llm_release_notes()
-            # Prepare the prompt with necessary data
-            response = llm_release.invoke(
-                {
-                    "release_tag": request.release_tag,
-                    "release_name": request.release_name,
-                    "project_name": request.project_name,
-                    "total_mrs": formatted_llm_data['total_documents'],
-                    "formatted_llm_data": formatted_llm_data['formatted_text']
-                }
-            )
-
-            if hasattr(response, "content"):
-                release_note = response.content
-            elif hasattr(response, "text"):
-                release_note = response.text
-            else:
-                release_note = str(response)
-            
-            # Extract detailed token usage
-            token_info = {
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "total_tokens": 0
-            }
-        
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                token_info = {
-                    "input_tokens": response.usage_metadata['input_tokens'],
-                    "output_tokens": response.usage_metadata['output_tokens'],
-                    "total_tokens": response.usage_metadata['total_tokens']
-                }
-
-            print(f"Generated Release Note")
-
-            return {
-                "release_note": release_note,
-                "token_usage": token_info,
-                "model_used": response.response_metadata['model_name'],
-                "generation_successful": True
-            }
-
-    except GroqAPIError as e:
-        raise DocumentationGenerationError(f"Groq API error: Failed to generate documentation: {str(e)}")
-    except LangChainException as e:
-        raise DocumentationGenerationError(f"LangChain error: Failed to generate documentation: {str(e)}")
+# HTTP/2 multiplexes concurrent MR requests over one TLS connection
+HTTP_CLIENT = Client(http2=True, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS, headers=HTTP_HEADERS)
+HTTP_ASYNC_CLIENT = AsyncClient(http2=True, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS, headers=HTTP_HEADERS)
+atexit.register(HTTP_CLIENT.close)
 
+MODEL_NAME = "llama-3.3-70b-versatile"
 
+# Upper bound on in-flight Groq requests, to stay inside the account's rate limits
+LLM_CONCURRENCY = asyncio.Semaphore(20)
 
-def setup_llm_mr_gitlab():
-    """Configure LLM for GitLab MR analysis with Jira context"""
+# Groq failures worth retrying: rate limits, 5xx responses and dropped connections
+TRANSIENT_GROQ_ERRORS = (RateLimitError, InternalServerError, APIConnectionError, TransportError)
+# Longest Retry-After we are willing to sleep through inside one request
+MAX_RETRY_AFTER = 30.0
 
-    http_client = Client(
-        verify=False,
-        timeout=60.0
-    )
-    
-    llm = ChatGroq(
-        groq_api_key=GROQ_API_KEY,
-        model_name="llama-3.3-70b-versatile",
-        temperature=0.3,
-        http_client=http_client
-    )
 
-    mr_prompt_text = """You are an expert Technical Writer and Product Communicator specializing in translating technical changes into business-focused documentation for C-suite executives and product leaders.
+class _WaitRetryAfter(wait_base):
+    """Sleep for Groq's Retry-After when it sends one, otherwise use the fallback backoff"""
 
-## INPUT DATA STRUCTURE
+    def __init__(self, fallback: wait_base):
+        self.fallback = fallback
 
-### Merge Request Context:
-- **Title:** {mr_title}
-- **Author:** {mr_author}
-- **Merged By:** {merged_by}
-- **Labels:** {labels}
-- **Description:** {mr_description}
+    def __call__(self, retry_state) -> float:
+        response = getattr(retry_state.outcome.exception(), "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return min(float(retry_after), MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            return self.fallback(retry_state)
 
-### Jira Ticket Context:
-{jira_context}
 
-### Code Changes Analysis:
-{formatted_commit_data}
+@retry(
+    stop=stop_after_attempt(5),
+    wait=_WaitRetryAfter(wait_exponential_jitter(initial=0.5, max=8)),
+    retry=retry_if_exception_type(TRANSIENT_GROQ_ERRORS),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+async def _invoke_with_retry(runnable, inputs):
+    """ainvoke, retrying transient Groq failures; the last error is re-raised once attempts run out"""
+    return await runnable.ainvoke(inputs)
 
-        ---
+# Prompts are parsed once at import; the chains below only bind them to a model
+MR_PROMPT_TEXT = """You are an expert Technical Writer and Product Communicator specializing in translating technical changes into business-focused documentation for C-suite executives and product leaders.
 
 ## YOUR TASK: Generate Leadership-Ready MR Documentation
 
-**Critical Instruction:** Base your analysis EXCLUSIVELY on the provided data above. Do not invent information, but DO extract and synthesize business value from what IS provided.
+**Critical Instruction:** Base your analysis EXCLUSIVELY on the INPUTS section at the end. Do not invent information, but DO extract and synthesize business value from what IS provided.
 
 **About Metrics:** If performance/productivity metrics are not explicitly stated in the source material, infer them from code changes. For example:
 - Caching implementation → "Eliminates redundant data fetches"
@@ -206,27 +124,27 @@ Answer these questions based on provided context:
 Create a structured list. **Only include categories where you have concrete evidence in the source data:**
 
 **Performance Improvement (if applicable):**
-- Analyze {formatted_commit_data} for: caching, query optimization, algorithm improvements, lazy loading, parallel processing
+- Analyze the Code Changes Analysis for: caching, query optimization, algorithm improvements, lazy loading, parallel processing
 - State what's faster/more efficient, and HOW you know (e.g., "fewer database calls", "reduces file I/O", "removes N+1 query problem")
 - Example: ✅ "Eliminates redundant API calls by caching user profiles" (NOT ❌ "improves performance")
 
 **Increased Productivity (if applicable):**
-- Analyze {mr_description} and {jira_context} for: automation, removing manual steps, reducing friction
+- Analyze the MR description and the Jira Ticket Context for: automation, removing manual steps, reducing friction
 - State what work is eliminated or accelerated
 - Example: ✅ "Removes requirement to manually validate report formats before sending to customers" (NOT ❌ "saves time")
 
 **User Adoption & Experience (if applicable):**
-- Analyze {mr_description} for: usability improvements, feature requests fulfilled, removed blockers
+- Analyze the MR description for: usability improvements, feature requests fulfilled, removed blockers
 - State what problem the user no longer faces
 - Example: ✅ "Eliminates timeout errors that previously occurred when generating reports for datasets >100K records" (NOT ❌ "improves user experience")
 
 **Cost/Resource Impact (if applicable):**
-- Analyze {formatted_commit_data} for: infrastructure optimization, reduced computational load, decreased storage
+- Analyze the Code Changes Analysis for: infrastructure optimization, reduced computational load, decreased storage
 - State resource savings or efficiency gains with specificity
 - Example: ✅ "Reduces server memory usage from X MB to Y MB per request" OR "Eliminates redundant compute jobs running hourly"
 
 **Risk Reduction (if applicable):**
-- Analyze {labels} and {mr_description} for: security patches, data integrity improvements, error handling
+- Analyze the MR labels and the MR description for: security patches, data integrity improvements, error handling
 - State what failure mode is prevented
 - Example: ✅ "Prevents data loss by adding transaction rollback on report generation failure" (NOT ❌ "improves reliability")
 
@@ -255,7 +173,7 @@ Use a bulleted list (max 5 points). Describe in terms of **user problems solved*
 - Example: ✅ "Eliminates need for manual job scheduling; automatic scaling now handles peak load periods"
 
 ### 5. SCOPE & BOUNDARIES
-Analyze {formatted_commit_data} for files modified. Analyze {mr_description} and {jira_context} for scope statements.
+Analyze the Code Changes Analysis for files modified. Analyze the MR description and the Jira Ticket Context for scope statements.
 
 - **In Scope:** [What IS included in this change - be specific about systems/features/modules]
   - Example: ✅ "Report generation pipeline, CI/CD workflow, caching layer for user profiles"
@@ -270,7 +188,7 @@ Analyze {formatted_commit_data} for files modified. Analyze {mr_description} and
   - Example: ✅ "Sales team, Finance department, Internal reporting operations"
 
 ### 6. RISK ASSESSMENT & MITIGATION
-Analyze {formatted_commit_data} to understand scope. Analyze {mr_description} for testing information.
+Analyze the Code Changes Analysis to understand scope. Analyze the MR description for testing information.
 
 **Risk Assessment Rules:**
 - **Scope of Changes:** More files modified = higher risk. Critical systems = higher impact
@@ -289,14 +207,14 @@ Analyze {formatted_commit_data} to understand scope. Analyze {mr_description} fo
 | Performance degradation during concurrent report generation | Low | Medium | Code optimization removes N+1 queries, reducing database load; load testing completed for 100+ concurrent users |
 
 ### 7. ACCEPTANCE & COMPLETION
-Extract from {jira_context}:
+Extract from the Jira Ticket Context:
 - **Jira Status:** [Extract from jira_context - current status]
 - **Assignee:** [Extract from jira_context - assignee_name]
 - **Definition of Done:** [Extract from Jira description if acceptance criteria are mentioned - specific testing, deployment requirements, documentation needs]
   - If not mentioned: Simply omit this field
 
 ### 8. RELATED INFORMATION
-Extract from {jira_context} and analyze {formatted_commit_data}:
+Extract from the Jira Ticket Context and analyze the Code Changes Analysis:
 
 - **Jira Key:** [Extract from jira_context - key field]
 - **Project:** [Extract from jira_context - project_name]
@@ -360,7 +278,7 @@ Extract from {jira_context} and analyze {formatted_commit_data}:
 
 ## ANALYSIS INSTRUCTIONS FOR LLM
 
-When analyzing {formatted_commit_data}, look for these patterns:
+When analyzing the Code Changes Analysis, look for these patterns:
 
 **Performance Patterns:**
 - Caching added → Eliminates redundant data fetches
@@ -417,356 +335,726 @@ This enables release note generators to:
 - Build category-specific release notes (features vs fixes vs enhancements)
 - Pull risk assessments for deployment planning
 - Create stakeholder communications with clear user benefits
+
+---
+INPUTS:
+
+### Merge Request Context:
+- **Title:** {mr_title}
+- **Author:** {mr_author}
+- **Merged By:** {merged_by}
+- **Labels:** {labels}
+- **Description:** {mr_description}
+
+### Jira Ticket Context:
+{jira_context}
+
+### Code Changes Analysis:
+{formatted_commit_data}
 """
 
-    prompt = PromptTemplate(
-        input_variables=[
-            "mr_title", 
-            "mr_author", 
-            "merged_by", 
-            "labels", 
-            "mr_description", 
-            "jira_context",
-            "formatted_commit_data"
-        ],
-        template=mr_prompt_text
-    )
+# The MR prompt split at its INPUTS marker: the instructions are a static system
+# message (shared by packed MRs too) and every variable sits in the trailing human
+# message, so the cacheable prefix is identical across MRs
+MR_INSTRUCTIONS, _, MR_INPUTS_TEXT = MR_PROMPT_TEXT.partition("\n---\nINPUTS:\n")
 
-    return prompt | llm
+MR_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", MR_INSTRUCTIONS),
+    ("human", "INPUTS:\n" + MR_INPUTS_TEXT),
+])
 
+PACKED_MR_INSTRUCTIONS = MR_INSTRUCTIONS + """
 
+## PACKED MERGE REQUESTS
 
-def build_jira_context(jira_data:JiraTicket):
-    """
-    Build Jira context string from available Jira fields.
-    Gracefully handles missing/None values.
-    
-    Args:
-        jira_data: Dictionary with optional keys: key, project_name, summary, 
-                   description, assignee_name, status_name, resolution
-    
-    Returns:
-        Formatted Jira context string or placeholder if no data available
-    """
-    if not jira_data:
-        return "[No Jira ticket linked]"
-    
-    context_parts = []
-    data = jira_data.model_dump()  # Convert to dict
-    
-    # Required fields
-    if data.get('key'):
-        context_parts.append(f"**Ticket ID:** {data['key']}")
+The INPUTS section holds several merge requests, headed "## MR 1", "## MR 2", and so on.
+Document each one independently, following everything above.
+Return ONLY a JSON array of strings: one string per merge request, in the same order, each holding that merge request's complete documentation.
+"""
 
-    if data.get('project_name'):
-        context_parts.append(f"**Project:** {data['project_name']}")
+RELEASE_NOTE_PROMPT_TEXT = """You are an expert Release Note Crafter specializing in translating technical changes into executive-ready communications for C-suite, product leaders, and stakeholders.
 
-    if data.get('summary'):
-        context_parts.append(f"**Summary:** {data['summary']}")
-    
-    # Optional fields
-    if data.get('description'):
-        context_parts.append(f"**Description:** {data['description']}")
+Your task is to synthesize a collection of individual merge request (MR) summaries into a single, cohesive, professional, and strategic release note.
 
-    if data.get('assignee_name'):
-        context_parts.append(f"**Assignee:** {data['assignee_name']}")
+## YOUR TASK: Generate Executive Release Note
 
-    if data.get('status_name'):
-        context_parts.append(f"**Status:** {data['status_name']}")
+**CRITICAL INSTRUCTION FOR LEADERSHIP AUDIENCE:**
+- This release note is EXCLUSIVELY for C-suite, VPs, and business stakeholders
+- DO NOT include internal checklists, staging details, testing workflows, or DevOps procedures
+- DO NOT mention "In Progress", "Staging verification", or internal process status
+- Focus ONLY on business impact, strategic value, and production-readiness
+- Assume readers care about: business outcomes, risk to operations, and affected teams
+- Assume readers DO NOT care about: staging environments, CI/CD details, internal verification steps
 
-    if data.get('resolution'):
-        context_parts.append(f"**Resolution:** {data['resolution']}")
+**Synthesis Requirement:** This is NOT copy-paste. You must:
+- Identify patterns across MRs (e.g., "3 performance improvements", "2 features for sales team")
+- Synthesize business value (e.g., aggregate time savings, total users impacted)
+- Highlight strategic themes (e.g., "This release focuses on automation and team productivity")
+- Flag critical risks that affect release decisions
 
-    # Return formatted context or placeholder if no data
-    return "\n".join(context_parts) if context_parts else "[No Jira ticket linked]"
+## OUTPUT FORMAT
 
+### 1. RELEASE HEADER
+Use this exact format:
 
-# Usage example:
-def generate_mr_summary(mr_data: dict, jira_data: dict, commit_data: str):
-    """
-    Generate MR summary with optional Jira context.
-    """
-    prompt_chain = setup_llm_mr_gitlab()
-    
-    jira_context = build_jira_context(jira_data)
-    
-    input_data = {
-        "mr_title": mr_data.get("title", ""),
-        "mr_author": mr_data.get("author", ""),
-        "merged_by": mr_data.get("merged_by", ""),
-        "labels": mr_data.get("labels", ""),
-        "mr_description": mr_data.get("description", ""),
-        "jira_context": jira_context,
-        "formatted_commit_data": commit_data
-    }
-    
-    return prompt_chain.invoke(input_data)
+# Release [Release Name] ([Release Tag])
+**Project:** [Project Name]
+**Release Date:** [Infer from MR data if available, otherwise "Ready for Release"]
+**Summary:** [1-sentence strategic theme of this release]
 
-# prompt for release note
-from langchain.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-from httpx import Client
+### 2. EXECUTIVE OVERVIEW (For C-Suite/Product Leaders)
+Write 2-3 paragraphs that answer:
+- **What is the strategic focus of this release?** (Analyze all MRs to identify theme: innovation, stability, performance, automation, user experience, cost reduction, risk mitigation)
+- **Who benefits and how?** (Identify stakeholder groups from MR summaries: sales team, finance, operations, end users, internal teams)
+- **What is the business impact?** (Synthesize business value: quantified improvements, cost savings, time saved, user adoption enablers, risk reduction)
+- **Is this release ready for production?** (Derive from MR completion status and risk assessment)
 
-def setup_llm_release_notes():
-    """Configure LLM for generating executive-ready release notes from MR summaries"""
+**Tone:** Executive summary for VP/CTO level. Lead with impact, not features.
 
-    http_client = Client(
-        verify=False,
-        timeout=60.0
-    )
-    
-    llm = ChatGroq(
-        groq_api_key=GROQ_API_KEY,
-        model_name="llama-3.3-70b-versatile",
-        temperature=0.3,
-        http_client=http_client
-    )
+### 3. KEY METRICS & IMPACT SUMMARY
+Synthesize quantifiable benefits from the MR summaries. Only include if data is provided in source material.
 
-    release_note_prompt_text = """You are an expert Release Note Crafter specializing in translating technical changes into executive-ready communications for C-suite, product leaders, and stakeholders.
+**Format:**
+| Impact Category | Metric | Affected Users |
+|---|---|---|
+| [Category] | [X]% improvement | [Team name] |
 
-    Your task is to synthesize a collection of individual merge request (MR) summaries into a single, cohesive, professional, and strategic release note.
+**Rules:**
+- Only include metrics explicitly mentioned in MR summaries
+- Aggregate across MRs (e.g., "2 features + 1 performance improvement = 3 high-impact changes")
+- Quantify user impact if available
+- Don't invent numbers or say "expected to save" unless stated in MRs
+- If no metrics available: Skip this section
 
-    ## Release Information:
-    - **Release Tag:** {release_tag}
-    - **Release Name:** {release_name}
-    - **Project Name:** {project_name}
-    - **Total MRs Included:** {total_mrs}
+### 4. CATEGORIZED CHANGES (Business-Focused)
+Read through all MR summaries and group them by **business impact category** (NOT technical type).
 
-    ## Source Material: Merge Request Summaries
-    Below are the complete business-focused summaries for each merge request in this release. Each includes: change classification, executive summary, business value, scope, risks, and completion status.
+#### 🎯 **New Capabilities**
+Major new features that enable users to do something previously impossible.
 
-    ---
-    {formatted_llm_data}
-    ---
+Format:
+- **[Feature Area]:** [What users can now do / Problem solved]
+- Affected teams: [Team 1, Team 2]
+- User benefit: [Specific outcome]
 
-    ## YOUR TASK: Generate Executive Release Note
+#### ⚡ **Performance & Efficiency Improvements**
+Enhancements that make operations faster, more reliable, or less resource-intensive.
 
-    **CRITICAL INSTRUCTION FOR LEADERSHIP AUDIENCE:**
-    - This release note is EXCLUSIVELY for C-suite, VPs, and business stakeholders
-    - DO NOT include internal checklists, staging details, testing workflows, or DevOps procedures
-    - DO NOT mention "In Progress", "Staging verification", or internal process status
-    - Focus ONLY on business impact, strategic value, and production-readiness
-    - Assume readers care about: business outcomes, risk to operations, and affected teams
-    - Assume readers DO NOT care about: staging environments, CI/CD details, internal verification steps
+Format:
+- **[System/Process Improved]:** [What improved and how]
+- Performance gain: [X% faster / Y% reduction in resource usage]
+- User impact: [Who benefits and how]
 
-    **Synthesis Requirement:** This is NOT copy-paste. You must:
-    - Identify patterns across MRs (e.g., "3 performance improvements", "2 features for sales team")
-    - Synthesize business value (e.g., aggregate time savings, total users impacted)
-    - Highlight strategic themes (e.g., "This release focuses on automation and team productivity")
-    - Flag critical risks that affect release decisions
+#### 🛡️ **Stability & Reliability Improvements**
+Bug fixes and error handling improvements that prevent problems or improve recovery.
 
-    ---
+Format:
+- **[Issue Fixed]:** [Problem that was occurring → Problem now resolved]
+- Affected users: [Who experienced the issue]
+- Business impact: [How this improves operations]
 
-    ## OUTPUT FORMAT
+#### 🤖 **Automation & Workflow Improvements**
+Changes that remove manual steps or improve workflow efficiency.
 
-    ### 1. RELEASE HEADER
-    Use this exact format:
+Format:
+- **[Workflow]:** [Manual step eliminated / Workflow improved]
+- Productivity gain: [What work is no longer needed]
+- Teams impacted: [Team 1, Team 2]
 
-    # Release [Release Name] ([Release Tag])
-    **Project:** {project_name}
-    **Release Date:** [Infer from MR data if available, otherwise "Ready for Release"]
-    **Summary:** [1-sentence strategic theme of this release]
+### 5. SCOPE & AFFECTED SYSTEMS
+Synthesize from MR data to show what's changing and what's NOT.
 
-    ---
+**In Scope:**
+- [System 1]: [What's changing]
+- [System 2]: [What's changing]
 
-    ### 2. EXECUTIVE OVERVIEW (For C-Suite/Product Leaders)
-    Write 2-3 paragraphs that answer:
-    - **What is the strategic focus of this release?** (Analyze all MRs to identify theme: innovation, stability, performance, automation, user experience, cost reduction, risk mitigation)
-    - **Who benefits and how?** (Identify stakeholder groups from MR summaries: sales team, finance, operations, end users, internal teams)
-    - **What is the business impact?** (Synthesize business value: quantified improvements, cost savings, time saved, user adoption enablers, risk reduction)
-    - **Is this release ready for production?** (Derive from MR completion status and risk assessment)
+**Out of Scope (Explicitly NOT in this release):**
+- [What's not included]
+- [Known limitations]
 
-    **Tone:** Executive summary for VP/CTO level. Lead with impact, not features.
+**Breaking Changes:** [List any, or state "None"]
 
-    ---
+### 6. RISK & MITIGATION SUMMARY (For Decision-Making)
 
-    ### 3. KEY METRICS & IMPACT SUMMARY
-    Synthesize quantifiable benefits from the MR summaries. Only include if data is provided in source material.
+**Production Risk Level:** [LOW / MEDIUM / HIGH]
+
+**Critical Risks & Mitigations:**
+- [Risk]: [Mitigation in place]
+- [Risk]: [Mitigation in place]
+
+Format for each risk:
+| Risk | Mitigation Strategy | Impact on Business |
+|------|-------------------|------------------|
+| [Risk] | [How mitigated] | [Business impact if it occurs] |
 
-    **Format:**
-    | Impact Category | Metric | Affected Users |
-    |---|---|---|
-    | [Category] | [X]% improvement | [Team name] |
+**Known Limitations:**
+- [Limitation 1]: [User impact / Workaround]
 
-    **Rules:**
-    - Only include metrics explicitly mentioned in MR summaries
-    - Aggregate across MRs (e.g., "2 features + 1 performance improvement = 3 high-impact changes")
-    - Quantify user impact if available
-    - Don't invent numbers or say "expected to save" unless stated in MRs
-    - If no metrics available: Skip this section
+If none: State "None identified"
 
-    ---
+**Production Readiness:** [Ready for Production / Not Recommended / Conditional]
+- [Brief rationale based on risk and testing completeness from MR data]
 
-    ### 4. CATEGORIZED CHANGES (Business-Focused)
-    Read through all MR summaries and group them by **business impact category** (NOT technical type).
+### 7. STAKEHOLDER IMPACT & RECOMMENDED ACTIONS
 
-    #### 🎯 **New Capabilities**
-    Major new features that enable users to do something previously impossible.
+**Affected Teams & What They Should Expect:**
+- [Team 1]: [What changes for them, what to watch for]
+- [Team 2]: [What changes for them, what to watch for]
 
-    Format:
-    - **[Feature Area]:** [What users can now do / Problem solved]
-    - Affected teams: [Team 1, Team 2]
-    - User benefit: [Specific outcome]
+**Actions Required from Teams:**
+- [Team 1]: [Specific actions, or "None"]
+- [Team 2]: [Specific actions, or "None"]
 
-    #### ⚡ **Performance & Efficiency Improvements**
-    Enhancements that make operations faster, more reliable, or less resource-intensive.
+**Training or Communication Needed:**
+- [Area]: [What communication is needed, or "None"]
 
-    Format:
-    - **[System/Process Improved]:** [What improved and how]
-    - Performance gain: [X% faster / Y% reduction in resource usage]
-    - User impact: [Who benefits and how]
+## KEY SYNTHESIS RULES
 
-    #### 🛡️ **Stability & Reliability Improvements**
-    Bug fixes and error handling improvements that prevent problems or improve recovery.
+When reading the merge request summaries:
 
-    Format:
-    - **[Issue Fixed]:** [Problem that was occurring → Problem now resolved]
-    - Affected users: [Who experienced the issue]
-    - Business impact: [How this improves operations]
+**Pattern Recognition:**
+- Count by category: "This release includes 3 performance improvements, 2 new features, and 1 stability fix"
+- Identify themes: "Release focuses on automation and user experience"
+- Group by stakeholder: "3 features benefit Sales team; 2 features benefit Finance"
 
-    #### 🤖 **Automation & Workflow Improvements**
-    Changes that remove manual steps or improve workflow efficiency.
+**Business Value Aggregation:**
+- Time savings: Add up all productivity gains
+- Performance gains: Note combined impact
+- Risk reduction: Note what problems are eliminated
 
-    Format:
-    - **[Workflow]:** [Manual step eliminated / Workflow improved]
-    - Productivity gain: [What work is no longer needed]
-    - Teams impacted: [Team 1, Team 2]
+**User Impact Synthesis:**
+- Teams affected: From MR summaries, identify all teams impacted
+- User count: Aggregate number of users benefiting
+- Adoption blockers removed: Identify features that were blocked before
 
-    ---
+**Risk Aggregation (Production-Only):**
+- Critical risks: Flag any risks marked "High impact" in MRs
+- Mitigations: What safeguards are in place
+- Business impact: What happens if this goes wrong
 
-    ### 5. SCOPE & AFFECTED SYSTEMS
-    Synthesize from MR data to show what's changing and what's NOT.
+## LANGUAGE & TONE
 
-    **In Scope:**
-    - [System 1]: [What's changing]
-    - [System 2]: [What's changing]
+**For C-Suite/Executive Audience:**
+- Lead with business value, not features
+- Use quantifiable metrics when available
+- Be clear about strategic importance
+- Focus on risk and readiness, not implementation details
+- Assume zero technical knowledge of internal processes
 
-    **Out of Scope (Explicitly NOT in this release):**
-    - [What's not included]
-    - [Known limitations]
+**What to INCLUDE for Leadership:**
++ Business outcomes
++ Team productivity gains
++ Risk to business operations
++ Production readiness (Yes/No/Conditional)
++ Affected teams and their actions
 
-    **Breaking Changes:** [List any, or state "None"]
+## OUTPUT STRUCTURE (Leadership-Ready)
 
-    ---
+Return release note in this exact order:
+1. Release Header
+2. Executive Overview
+3. Key Metrics & Impact
+4. Categorized Changes
+5. Scope & Affected Systems
+6. Risk & Mitigation Summary
+7. Stakeholder Impact & Recommended Actions
 
-    ### 6. RISK & MITIGATION SUMMARY (For Decision-Making)
+**DO NOT INCLUDE:**
+- Staging environment details
+- CI/CD pipeline specifics
+- Internal verification checklists, including a FINAL VERIFICATION CHECKLIST
+- TIMELINE & MILESTONES with staging details
+- SUPPORT & ROLLBACK PLAN (too technical for leadership)
+- DevOps or deployment procedures
+- Testing methodologies or testing status
+- Status labels like "In Progress" or "Pending"
 
-    **Production Risk Level:** [LOW / MEDIUM / HIGH]
+---
+INPUTS:
 
-    **Critical Risks & Mitigations:**
-    - [Risk]: [Mitigation in place]
-    - [Risk]: [Mitigation in place]
+## Release Information:
+- **Project Name:** {project_name}
+- **Release Tag:** {release_tag}
+- **Release Name:** {release_name}
+- **Total MRs Included:** {total_mrs}
 
-    Format for each risk:
-    | Risk | Mitigation Strategy | Impact on Business |
-    |------|-------------------|------------------|
-    | [Risk] | [How mitigated] | [Business impact if it occurs] |
+## Source Material: Merge Request Summaries
+Below are the complete business-focused summaries for each merge request in this release. Each includes: change classification, executive summary, business value, scope, risks, and completion status. A summary listing several SHAs covers merge requests with identical documentation.
 
-    **Known Limitations:**
-    - [Limitation 1]: [User impact / Workaround]
+---
+{formatted_llm_data}
+"""
 
-    If none: State "None identified"
+# The static instructions go out as the system message and the per-release
+# inputs as a trailing human message, so every release shares a byte-identical
+# prefix that Groq's prompt cache can reuse
+RELEASE_NOTE_INSTRUCTIONS, _, RELEASE_NOTE_INPUTS_TEXT = RELEASE_NOTE_PROMPT_TEXT.partition("\n\n---\nINPUTS:\n")
 
-    **Production Readiness:** [Ready for Production / Not Recommended / Conditional]
-    - [Brief rationale based on risk and testing completeness from MR data]
+RELEASE_NOTE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", RELEASE_NOTE_INSTRUCTIONS),
+    ("human", "INPUTS:\n" + RELEASE_NOTE_INPUTS_TEXT),
+])
 
-    ---
 
-    ### 7. STAKEHOLDER IMPACT & RECOMMENDED ACTIONS
+async def generate_documentation_with_llm(formatted_llm_data: str, request, jira_ticket_data: Optional[JiraTicket] = None):
+    """
+    Generate documentation using LLM based on formatted commit data.
+    This function prepares the prompt and calls the LLM to generate documentation.
+    """
+    handler = _HANDLERS.get(type(request))
+    if handler is None:
+        raise DocumentationGenerationError(f"Unsupported request type: {type(request).__name__}")
+    build_inputs, setup_chain, result_key, prompt_text = handler
+
+    # Replays of identical inputs are served without calling the model
+    cache_key = documentation_cache_key(MODEL_NAME, formatted_llm_data, request, jira_ticket_data)
+    cached_result = get_cached_response(cache_key)
+    if cached_result is not None:
+        logger.info("Documentation served from the response cache")
+        return cached_result
+
+    # Identical requests arriving while this one runs share its call
+    async def generate():
+        inputs = _within_context(build_inputs(request, formatted_llm_data, jira_ticket_data), prompt_text)
+        try:
+            response = await _invoke_with_retry(setup_chain(), inputs)
+        except (GroqAPIError, TransportError) as e:
+            raise DocumentationGenerationError(f"Groq API error: Failed to generate documentation: {str(e)}")
+        except LangChainException as e:
+            raise DocumentationGenerationError(f"LangChain error: Failed to generate documentation: {str(e)}")
+
+        text, token_info, model_used = _extract_text_and_tokens(response)
+        logger.debug("%s generated tokens=%s", result_key, token_info)
+
+        result = {
+            result_key: text,
+            "token_usage": token_info,
+            "model_used": model_used,
+            "generation_successful": True
+        }
+        cache_response(cache_key, result)
+        return result
+
+    return await single_flight(cache_key, generate)
+
+
+async def stream_documentation_with_llm(formatted_llm_data, request, jira_ticket_data: Optional[JiraTicket] = None):
+    """
+    Yield the generated documentation text as Groq produces it.
+    The complete answer is cached once the stream finishes, so a replay is served in one piece.
+    """
+    handler = _HANDLERS.get(type(request))
+    if handler is None:
+        raise DocumentationGenerationError(f"Unsupported request type: {type(request).__name__}")
+    build_inputs, setup_chain, result_key, prompt_text = handler
+
+    cache_key = documentation_cache_key(MODEL_NAME, formatted_llm_data, request, jira_ticket_data)
+    cached_result = get_cached_response(cache_key)
+    if cached_result is not None:
+        yield cached_result[result_key]
+        return
+
+    # Chunks add up to one message carrying the final usage and model metadata
+    inputs = _within_context(build_inputs(request, formatted_llm_data, jira_ticket_data), prompt_text)
+    message = None
+    try:
+        async for chunk in setup_chain().astream(inputs):
+            message = chunk if message is None else message + chunk
+            yield chunk.content
+    except (GroqAPIError, TransportError) as e:
+        raise DocumentationGenerationError(f"Groq API error: Failed to generate documentation: {str(e)}")
+    except LangChainException as e:
+        raise DocumentationGenerationError(f"LangChain error: Failed to generate documentation: {str(e)}")
+
+    if message is None:
+        return
+    text, token_info, model_used = _extract_text_and_tokens(message)
+    cache_response(cache_key, {
+        result_key: text,
+        "token_usage": token_info,
+        "model_used": model_used,
+        "generation_successful": True
+    })
+
+
+def _mr_inputs(request: MRDocumentationRequest, formatted_llm_data: str, jira_ticket_data: Optional[JiraTicket]) -> dict:
+    """Prompt variables for MR documentation"""
+    return {
+        "mr_title": canonical_text(request.title),
+        "mr_author": canonical_text(request.author),
+        "merged_by": canonical_text(request.merged_by),
+        "labels": canonical_labels(request.labels),
+        "mr_description": canonical_text(request.description),
+        # Build Jira context (handles missing data gracefully)
+        "jira_context": build_jira_context(jira_ticket_data) if jira_ticket_data else "[No Jira ticket linked]",
+        "formatted_commit_data": fit_to_token_budget(formatted_llm_data, MR_DIFF_TOKEN_BUDGET)
+    }
+
+
+def _release_note_inputs(request: ReleaseNoteRequest, formatted_llm_data: dict, jira_ticket_data=None) -> dict:
+    """Prompt variables for a release note built from MR documentation"""
+    return {
+        "release_tag": canonical_text(request.release_tag),
+        "release_name": canonical_text(request.release_name),
+        "project_name": canonical_text(request.project_name),
+        "total_mrs": formatted_llm_data['total_documents'],
+        "formatted_llm_data": fit_to_token_budget(formatted_llm_data['formatted_text'], RELEASE_DOCS_TOKEN_BUDGET)
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _template_tokens(prompt_text: str) -> int:
+    """Tokens in a prompt template's fixed text, counted once per template"""
+    return count_tokens(prompt_text)
+
+
+def _within_context(inputs: dict, prompt_text: str) -> dict:
+    """
+    Fail fast when the filled prompt cannot fit the model context, instead of
+    paying a round trip for Groq to reject it. Diffs are already trimmed to
+    their budget, so only oversized free-text fields can still overflow.
+    """
+    prompt_tokens = _template_tokens(prompt_text) + sum(count_tokens(str(value)) for value in inputs.values())
+    if prompt_tokens > CONTEXT_TOKEN_LIMIT:
+        raise DocumentationGenerationError(
+            f"Prompt of {prompt_tokens} tokens exceeds the {CONTEXT_TOKEN_LIMIT} token context limit"
+        )
+    return inputs
 
-    **Affected Teams & What They Should Expect:**
-    - [Team 1]: [What changes for them, what to watch for]
-    - [Team 2]: [What changes for them, what to watch for]
 
-    **Actions Required from Teams:**
-    - [Team 1]: [Specific actions, or "None"]
-    - [Team 2]: [Specific actions, or "None"]
+async def generate_documentation_batched(items, batch_token_budget: int = 12000):
+    """
+    Generate MR documentation for many small MRs with fewer Groq calls.
 
-    **Training or Communication Needed:**
-    - [Area]: [What communication is needed, or "None"]
+    items are (formatted_llm_data, request, jira_ticket_data) tuples. MRs are packed
+    greedily into shared prompts until their diffs reach batch_token_budget tokens;
+    an MR that fills a pack on its own, or a pack whose answer can't be parsed, falls
+    back to one call per MR. Packs run concurrently. Results keep input order, and
+    an MR that still fails comes back as its exception.
+    """
+    packs, pack, pack_tokens = [], [], 0
+    for index, item in enumerate(items):
+        tokens = count_tokens(item[0])
+        if pack and pack_tokens + tokens > batch_token_budget:
+            packs.append(pack)
+            pack, pack_tokens = [], 0
+        pack.append(index)
+        pack_tokens += tokens
+    if pack:
+        packs.append(pack)
+
+    results = [None] * len(items)
+
+    async def run(pack):
+        pack_items = [items[index] for index in pack]
+        pack_results = None
+        if len(pack_items) > 1:
+            async with LLM_CONCURRENCY:
+                pack_results = await _generate_packed(pack_items)
+        if pack_results is None:
+            pack_results = await generate_documentation_batch(pack_items)
+        for index, result in zip(pack, pack_results):
+            results[index] = result
+
+    await asyncio.gather(*(run(pack) for pack in packs))
+    return results
+
+
+async def _generate_packed(items):
+    """One Groq call for several MRs; returns None when the answer can't be split per MR"""
+    sections = "\n\n".join(
+        f"## MR {number}\n" + MR_INPUTS_TEXT.format(**_mr_inputs(request, formatted_llm_data, jira_ticket_data))
+        for number, (formatted_llm_data, request, jira_ticket_data) in enumerate(items, 1)
+    )
+    # Same system/human split as MR_PROMPT; sections are already rendered, so no template
+    messages = [SystemMessage(PACKED_MR_INSTRUCTIONS), HumanMessage(f"INPUTS:\n\n{sections}")]
 
-    ---
+    try:
+        response = await _invoke_with_retry(setup_groq_llm("codeclarity-mr-docs"), messages)
+    except (GroqAPIError, TransportError, LangChainException) as e:
+        logger.warning("Packed MR generation failed, falling back to one call per MR: %s", e)
+        return None
+
+    text, token_info, model_used = _extract_text_and_tokens(response)
+    documents = _parse_json_array(text)
+    if documents is None or len(documents) != len(items):
+        logger.warning("Packed MR answer did not split into %s documents, falling back to one call per MR", len(items))
+        return None
+
+    results = []
+    for number, ((formatted_llm_data, request, jira_ticket_data), document) in enumerate(zip(items, documents)):
+        result = {
+            "mr_documentation": document,
+            # The packed call's usage is reported once, on its first MR, so totals add up
+            "token_usage": token_info if number == 0 else {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+            "model_used": model_used,
+            "generation_successful": True,
+            "batch_size": len(items)
+        }
+        cache_response(documentation_cache_key(MODEL_NAME, formatted_llm_data, request, jira_ticket_data), result)
+        results.append(result)
+    return results
 
-    ## KEY SYNTHESIS RULES
 
-    When reading {formatted_llm_data}:
+def _parse_json_array(text: str):
+    """Parse a JSON array of strings, tolerating a surrounding Markdown code fence"""
+    body = text.strip()
+    if body.startswith("```"):
+        body = body.partition("\n")[2].rsplit("```", 1)[0]
+    try:
+        parsed = json.loads(body)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(parsed, list) or not all(isinstance(document, str) for document in parsed):
+        return None
+    return parsed
 
-    **Pattern Recognition:**
-    - Count by category: "This release includes 3 performance improvements, 2 new features, and 1 stability fix"
-    - Identify themes: "Release focuses on automation and user experience"
-    - Group by stakeholder: "3 features benefit Sales team; 2 features benefit Finance"
 
-    **Business Value Aggregation:**
-    - Time savings: Add up all productivity gains
-    - Performance gains: Note combined impact
-    - Risk reduction: Note what problems are eliminated
+def _extract_text_and_tokens(response: AIMessage) -> tuple[str, dict, str]:
+    """Pull the generated text, token usage and model name out of a chat response"""
+    # usage_metadata is already a dict with input/output/total token counts, plus
+    # input_token_details (e.g. cache_read) when Groq reports prompt cache hits
+    token_info = response.usage_metadata or {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    return response.content, token_info, response.response_metadata.get('model_name', MODEL_NAME)
 
-    **User Impact Synthesis:**
-    - Teams affected: From MR summaries, identify all teams impacted
-    - User count: Aggregate number of users benefiting
-    - Adoption blockers removed: Identify features that were blocked before
 
-    **Risk Aggregation (Production-Only):**
-    - Critical risks: Flag any risks marked "High impact" in MRs
-    - Mitigations: What safeguards are in place
-    - Business impact: What happens if this goes wrong
+async def generate_documentation_batch(items):
+    """
+    Generate documentation for several (formatted_llm_data, request, jira_ticket_data)
+    items concurrently, at most LLM_CONCURRENCY at a time. Results keep input order.
+    Items with identical prompt inputs (cherry-picks, re-runs) are generated once.
+    A failed item comes back as its exception instead of failing the whole batch.
+    """
+    async def generate(formatted_llm_data, request, jira_ticket_data=None):
+        async with LLM_CONCURRENCY:
+            return await generate_documentation_with_llm(formatted_llm_data, request, jira_ticket_data)
 
-    ---
+    keys = [documentation_cache_key(MODEL_NAME, *item) for item in items]
+    unique = {}
+    for key, item in zip(keys, items):
+        unique.setdefault(key, item)
 
-    ## LANGUAGE & TONE
+    outcomes = await asyncio.gather(*(generate(*item) for item in unique.values()), return_exceptions=True)
+    results = dict(zip(unique, outcomes))
 
-    **For C-Suite/Executive Audience:**
-    - Lead with business value, not features
-    - Use quantifiable metrics when available
-    - Be clear about strategic importance
-    - Focus on risk and readiness, not implementation details
-    - Assume zero technical knowledge of internal processes
+    # The first occurrence gets the result; later ones get their own copy with zero usage
+    batch, seen = [], set()
+    for key in keys:
+        result = results[key]
+        if key in seen and isinstance(result, dict):
+            result = deduplicated_copy(result)
+        seen.add(key)
+        batch.append(result)
+    return batch
 
-    **What to EXCLUDE for Leadership:**
-    - ❌ Staging environment details
-    - ❌ CI/CD pipeline specifics
-    - ❌ Internal verification checklists
-    - ❌ DevOps procedures
-    - ❌ Testing methodologies
-    - ❌ Status labels like "In Progress" or "Pending"
 
-    **What to INCLUDE for Leadership:**
-    - ✅ Business outcomes
-    - ✅ Team productivity gains
-    - ✅ Risk to business operations
-    - ✅ Production readiness (Yes/No/Conditional)
-    - ✅ Affected teams and their actions
+# Groq Batch API: asynchronous processing at a discount, for backfills that can wait
+BATCH_POLL_INITIAL = 5.0
+BATCH_POLL_MAX = 60.0
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# LangChain message type -> chat completions role
+_BATCH_ROLES = {"system": "system", "human": "user"}
 
-    ---
 
-    ## OUTPUT STRUCTURE (Leadership-Ready)
+@functools.lru_cache(maxsize=1)
+def get_groq_client() -> AsyncGroq:
+    """Raw Groq SDK client on the shared async HTTP client, for the Files and Batches APIs"""
+    return AsyncGroq(api_key=get_settings()["groq_api_key"], http_client=HTTP_ASYNC_CLIENT)
 
-    Return release note in this exact order:
-    1. Release Header
-    2. Executive Overview
-    3. Key Metrics & Impact
-    4. Categorized Changes
-    5. Scope & Affected Systems
-    6. Risk & Mitigation Summary
-    7. Stakeholder Impact & Recommended Actions
 
-    **DO NOT INCLUDE:**
-    - ❌ FINAL VERIFICATION CHECKLIST
-    - ❌ TIMELINE & MILESTONES with staging details
-    - ❌ SUPPORT & ROLLBACK PLAN (too technical for leadership)
-    - ❌ Deployment procedures
-    - ❌ Testing status
+async def generate_documentation_via_batch_api(items, deadline: float = 3600.0):
     """
+    Generate MR documentation for many MRs through Groq's Batch API.
+
+    items are (formatted_llm_data, request, jira_ticket_data) tuples. Cached MRs are
+    answered directly and the rest are submitted as one JSONL batch, polled with
+    exponential backoff. If the batch is not done within deadline seconds it is
+    cancelled, and any MR without a batch result goes through
+    generate_documentation_batch instead. Results keep input order, and a failed
+    MR comes back as its exception.
+    """
+    results = [None] * len(items)
+    keys = [documentation_cache_key(MODEL_NAME, *item) for item in items]
+    pending = []
+    for index, key in enumerate(keys):
+        results[index] = get_cached_response(key)
+        if results[index] is None:
+            pending.append(index)
+    if not pending:
+        return results
+
+    prompt_text = _HANDLERS[MRDocumentationRequest][3]
+    lines = []
+    for index in pending:
+        formatted_llm_data, request, jira_ticket_data = items[index]
+        try:
+            inputs = _within_context(_mr_inputs(request, formatted_llm_data, jira_ticket_data), prompt_text)
+        except DocumentationGenerationError as e:
+            # Reported like a failed item of generate_documentation_batch
+            results[index] = e
+            continue
+        messages = [
+            {"role": _BATCH_ROLES[message.type], "content": message.content}
+            for message in MR_PROMPT.format_messages(**inputs)
+        ]
+        lines.append(json.dumps({
+            "custom_id": str(index),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": MODEL_NAME, "temperature": 0.3, "user": "codeclarity-mr-docs", "messages": messages},
+        }))
+
+    try:
+        for index, result in (await _run_groq_batch(lines, deadline) if lines else []):
+            results[index] = result
+            cache_response(keys[index], result)
+    except (GroqAPIError, TransportError) as e:
+        logger.warning("Groq batch failed, generating %s MRs online: %s", len(pending), e)
+
+    missing = [index for index in pending if results[index] is None]
+    if missing:
+        fallback = await generate_documentation_batch([items[index] for index in missing])
+        for index, result in zip(missing, fallback):
+            results[index] = result
+    return results
+
+
+async def _run_groq_batch(lines, deadline: float):
+    """Submit JSONL request lines as one batch and return (index, result) pairs for the successful ones"""
+    client = get_groq_client()
+    batch_file = await client.files.create(file=("mr_documentation.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+    )
+
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + deadline
+    delay = BATCH_POLL_INITIAL
+    while batch.status not in BATCH_TERMINAL_STATUSES and loop.time() < give_up_at:
+        await asyncio.sleep(min(delay, give_up_at - loop.time()))
+        delay = min(delay * 2, BATCH_POLL_MAX)
+        batch = await client.batches.retrieve(batch.id)
+
+    if batch.status not in BATCH_TERMINAL_STATUSES:
+        logger.warning("Groq batch %s still %s after %.0fs, cancelling", batch.id, batch.status, deadline)
+        batch = await client.batches.cancel(batch.id)
+    if not batch.output_file_id:
+        return []
+
+    output = await client.files.content(batch.output_file_id)
+    completed = []
+    for line in (await output.text()).splitlines():
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        body = response["body"]
+        usage = body.get("usage") or {}
+        completed.append((int(record["custom_id"]), {
+            "mr_documentation": body["choices"][0]["message"]["content"],
+            "token_usage": {
+                "input_tokens": usage.get("prompt_tokens", 0),
+                "output_tokens": usage.get("completion_tokens", 0),
+                "total_tokens": usage.get("total_tokens", 0)
+            },
+            "model_used": body.get("model", MODEL_NAME),
+            "generation_successful": True
+        }))
+    return completed
+
+
+
+@functools.lru_cache(maxsize=None)
+def setup_groq_llm(user: str) -> ChatGroq:
+    """ChatGroq model on the shared HTTP clients, one per caller key (built once, then reused)"""
+    return ChatGroq(
+        groq_api_key=get_settings()["groq_api_key"],
+        model_name=MODEL_NAME,
+        temperature=0.3,
+        http_client=HTTP_CLIENT,
+        http_async_client=HTTP_ASYNC_CLIENT,
+        # Retries are handled by _invoke_with_retry, so the SDK's own would only multiply them
+        max_retries=0,
+        # Stable caller key keeps requests on replicas that hold the cached prompt prefix
+        model_kwargs={"user": user}
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def setup_llm_mr_gitlab():
+    """Configure LLM for GitLab MR analysis with Jira context (built once, then reused)"""
+    return MR_PROMPT | setup_groq_llm("codeclarity-mr-docs")
+
+
+# Jira fields rendered into the prompt, in order, with their labels
+JIRA_CONTEXT_FIELDS = (
+    ("key", "Ticket ID"),
+    ("project_name", "Project"),
+    ("summary", "Summary"),
+    ("description", "Description"),
+    ("assignee_name", "Assignee"),
+    ("status_name", "Status"),
+    ("resolution", "Resolution"),
+)
+
+
+def build_jira_context(jira_data:JiraTicket):
+    """
+    Build Jira context string from available Jira fields.
+    Gracefully handles missing/None values.
     
-    prompt = PromptTemplate(
-            input_variables=[
-                "release_tag",
-                "release_name",
-                "project_name",
-                "total_mrs",
-                "formatted_llm_data"
-            ],
-            template=release_note_prompt_text
-        )
+    Args:
+        jira_data: Dictionary with optional keys: key, project_name, summary, 
+                   description, assignee_name, status_name, resolution
+    
+    Returns:
+        Formatted Jira context string or placeholder if no data available
+    """
+    if not jira_data:
+        return "[No Jira ticket linked]"
+    
+    # Read attributes straight off the model; a model_dump() copy isn't needed
+    context = "\n".join(
+        f"**{label}:** {value}"
+        for attr, label in JIRA_CONTEXT_FIELDS
+        if (value := getattr(jira_data, attr, None))
+    )
+
+    # Return formatted context or placeholder if no data
+    return context or "[No Jira ticket linked]"
+
+
+# Usage example:
+def generate_mr_summary(mr_data: dict, jira_data: dict, commit_data: str):
+    """
+    Generate MR summary with optional Jira context.
+    """
+    prompt_chain = setup_llm_mr_gitlab()
+    
+    jira_context = build_jira_context(jira_data)
+    
+    input_data = {
+        "mr_title": mr_data.get("title", ""),
+        "mr_author": mr_data.get("author", ""),
+        "merged_by": mr_data.get("merged_by", ""),
+        "labels": mr_data.get("labels", ""),
+        "mr_description": mr_data.get("description", ""),
+        "jira_context": jira_context,
+        "formatted_commit_data": commit_data
+    }
+    
+    return prompt_chain.invoke(input_data)
+
+# prompt for release note
+
+@functools.lru_cache(maxsize=None)
+def setup_llm_release_notes():
+    """Configure LLM for generating executive-ready release notes from MR summaries (built once, then reused)"""
+    return RELEASE_NOTE_PROMPT | setup_groq_llm("codeclarity-release-notes")
+
 
-    return prompt | llm
\ No newline at end of file
+# Request type -> (prompt inputs builder, chain factory, result key, static prompt tokens)
+_HANDLERS = {
+    MRDocumentationRequest: (_mr_inputs, setup_llm_mr_gitlab, "mr_documentation", MR_PROMPT_TEXT),
+    ReleaseNoteRequest: (_release_note_inputs, setup_llm_release_notes, "release_note", RELEASE_NOTE_PROMPT_TEXT),
+}
@@ -1,187 +1,238 @@
 from __future__ import annotations
-from langchain.prompts import PromptTemplate
-from langchain_core.exceptions import LangChainException
-from dotenv import load_dotenv
+import asyncio
+import functools
 import os
-from pyparsing import Optional
+from typing import Optional
 from models.gitlab.MRDocumentationRequest import MRDocumentationRequest
 from models.gitlab.ReleaseNoteRequest import ReleaseNoteRequest
 import logging
 from exception.exceptions import *
-import vertexai
-from vertexai.generative_models import GenerativeModel, GenerationConfig
 from models.jira_model import JiraTicket
+from llm_analysis.response_cache import cache_response, canonical_labels, canonical_text, deduplicated_copy, documentation_cache_key, get_cached_response, single_flight
+from llm_analysis.token_budget import MR_DIFF_TOKEN_BUDGET, RELEASE_DOCS_TOKEN_BUDGET, fit_to_token_budget
 
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
-# Gemini configuration
+# Gemini configuration; app.py loads .env before any module is imported
 GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
 GOOGLE_CLOUD_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "europe-west1")
 
-# Initialize Vertex AI once
-vertexai.init(project=GOOGLE_CLOUD_PROJECT, location=GOOGLE_CLOUD_LOCATION)
+MODEL_NAME = "gemini-2.5-flash"
+# Release notes only condense MR documentation that is already written, so a
+# lighter model (e.g. gemini-2.5-flash-lite) can be routed there per deployment
+RELEASE_NOTE_MODEL_NAME = os.getenv("GEMINI_RELEASE_NOTE_MODEL", MODEL_NAME)
+
+# Upper bound on in-flight Gemini requests, to stay inside Vertex AI quotas
+LLM_CONCURRENCY = asyncio.Semaphore(20)
 
 
-def generate_documentation_with_llm(formatted_llm_data: str, request, jira_ticket_data: Optional[JiraTicket] = None):
+async def generate_documentation_with_llm(formatted_llm_data: str, request, jira_ticket_data: Optional[JiraTicket] = None):
     """
     Generate documentation using Gemini LLM based on formatted commit data.
     This function prepares the prompt and calls the LLM to generate documentation.
     """
+    build_prompt, setup_model, result_key, model_name = _get_handler(request)
+
+    # Replays of identical inputs are served without calling the model
+    cache_key = documentation_cache_key(model_name, formatted_llm_data, request, jira_ticket_data)
+    cached_result = get_cached_response(cache_key)
+    if cached_result is not None:
+        logger.info("Documentation served from the response cache")
+        return cached_result
+
+    # Identical requests arriving while this one runs share its call
+    async def generate():
+        try:
+            response = await setup_model().generate_content_async(build_prompt(request, formatted_llm_data, jira_ticket_data))
+            text = response.text
+        except Exception as e:
+            raise DocumentationGenerationError(f"Gemini API error: Failed to generate documentation: {str(e)}")
+
+        token_info = _token_usage(response)
+        logger.debug("%s generated tokens=%s", result_key, token_info)
+
+        result = {
+            result_key: text,
+            "token_usage": token_info,
+            "model_used": model_name,
+            "generation_successful": True
+        }
+        cache_response(cache_key, result)
+        return result
+
+    return await single_flight(cache_key, generate)
+
+
+async def stream_documentation_with_llm(formatted_llm_data: str, request, jira_ticket_data: Optional[JiraTicket] = None):
+    """
+    Yield the generated documentation text as Gemini produces it.
+    The complete answer is cached once the stream finishes, so a replay is served in one piece.
+    """
+    build_prompt, setup_model, result_key, model_name = _get_handler(request)
+
+    cache_key = documentation_cache_key(model_name, formatted_llm_data, request, jira_ticket_data)
+    cached_result = get_cached_response(cache_key)
+    if cached_result is not None:
+        yield cached_result[result_key]
+        return
+
+    chunks = []
+    last_chunk = None
     try:
-        if isinstance(request, MRDocumentationRequest):
-            # Setup LLM with MR context
-            model = setup_llm_mr_gitlab()
-            
-            # Build Jira context (handles missing data gracefully)
-            jira_context = build_jira_context(jira_ticket_data) if jira_ticket_data else "[No Jira ticket linked]"
-            
-            # Prepare the prompt with necessary data
-            mr_prompt_template = get_mr_prompt_template()
-            
-            prompt_text = mr_prompt_template.format(
-                mr_title=request.title,
-                mr_author=request.author,
-                merged_by=request.merged_by,
-                labels=request.labels,
-                mr_description=request.description,
-                jira_context=jira_context,
-                formatted_commit_data=formatted_llm_data
-            )
-            
-            # Generate response
-            response = model.generate_content(prompt_text)
-            mr_documentation = response.text
-            
-            logger.info("MR Documentation generated successfully")
-            
-            # Extract detailed token usage
-            token_info = {
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "total_tokens": 0
-            }
-            
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                token_info = {
-                    "input_tokens": response.usage_metadata.prompt_token_count,
-                    "output_tokens": response.usage_metadata.candidates_token_count,
-                    "total_tokens": response.usage_metadata.total_token_count
-                }
-            
-            return {
-                "mr_documentation": mr_documentation,
-                "token_usage": token_info,
-                "model_used": "gemini-2.5-flash",
-                "generation_successful": True
-            }
-
-        elif isinstance(request, ReleaseNoteRequest):
-            # Setup LLM with Release Note context
-            model = setup_llm_release_notes()
-            
-            # Prepare the prompt with necessary data
-            release_prompt_template = get_release_prompt_template()
-            
-            prompt_text = release_prompt_template.format(
-                release_tag=request.release_tag,
-                release_name=request.release_name,
-                project_name=request.project_name,
-                total_mrs=formatted_llm_data['total_documents'],
-                formatted_llm_data=formatted_llm_data['formatted_text']
-            )
-            
-            # Generate response
-            response = model.generate_content(prompt_text)
-            release_note = response.text
-            
-            # Extract detailed token usage
-            token_info = {
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "total_tokens": 0
-            }
-            
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                token_info = {
-                    "input_tokens": response.usage_metadata.prompt_token_count,
-                    "output_tokens": response.usage_metadata.candidates_token_count,
-                    "total_tokens": response.usage_metadata.total_token_count
-                }
-            
-            logger.info("Release Note generated successfully")
-            
-            return {
-                "release_note": release_note,
-                "token_usage": token_info,
-                "model_used": "gemini-2.5-flash",
-                "generation_successful": True
-            }
-
-    except LangChainException as e:
-        raise DocumentationGenerationError(f"LangChain error: Failed to generate documentation: {str(e)}")
+        response = await setup_model().generate_content_async(
+            build_prompt(request, formatted_llm_data, jira_ticket_data), stream=True
+        )
+        async for chunk in response:
+            last_chunk = chunk
+            chunks.append(chunk.text)
+            yield chunk.text
     except Exception as e:
         raise DocumentationGenerationError(f"Gemini API error: Failed to generate documentation: {str(e)}")
 
+    # Every chunk carries usage so far; the last one has the totals for the call
+    cache_response(cache_key, {
+        result_key: "".join(chunks),
+        "token_usage": _token_usage(last_chunk),
+        "model_used": model_name,
+        "generation_successful": True
+    })
+
+
+def _get_handler(request):
+    handler = _HANDLERS.get(type(request))
+    if handler is None:
+        raise DocumentationGenerationError(f"Unsupported request type: {type(request).__name__}")
+    return handler
+
+
+def _mr_prompt(request: MRDocumentationRequest, formatted_llm_data: str, jira_ticket_data: Optional[JiraTicket]) -> str:
+    # Build Jira context (handles missing data gracefully)
+    jira_context = build_jira_context(jira_ticket_data) if jira_ticket_data else "[No Jira ticket linked]"
+    return MR_PROMPT.format(
+        mr_title=canonical_text(request.title),
+        mr_author=canonical_text(request.author),
+        merged_by=canonical_text(request.merged_by),
+        labels=canonical_labels(request.labels),
+        mr_description=canonical_text(request.description),
+        jira_context=jira_context,
+        formatted_commit_data=fit_to_token_budget(formatted_llm_data, MR_DIFF_TOKEN_BUDGET)
+    )
+
+
+def _release_note_prompt(request: ReleaseNoteRequest, formatted_llm_data: dict, jira_ticket_data: Optional[JiraTicket]) -> str:
+    return RELEASE_NOTE_PROMPT.format(
+        release_tag=canonical_text(request.release_tag),
+        release_name=canonical_text(request.release_name),
+        project_name=canonical_text(request.project_name),
+        total_mrs=formatted_llm_data['total_documents'],
+        formatted_llm_data=fit_to_token_budget(formatted_llm_data['formatted_text'], RELEASE_DOCS_TOKEN_BUDGET)
+    )
+
+
+def _token_usage(response) -> dict:
+    """Map Gemini's usage metadata onto the token_usage shape the services expect"""
+    usage = getattr(response, 'usage_metadata', None)
+    if not usage:
+        return {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    return {
+        "input_tokens": usage.prompt_token_count,
+        "output_tokens": usage.candidates_token_count,
+        "total_tokens": usage.total_token_count,
+        # Prompt tokens served from Gemini's implicit prefix cache
+        "cached_input_tokens": usage.cached_content_token_count
+    }
+
+
+async def generate_documentation_batch(items):
+    """
+    Generate documentation for several (formatted_llm_data, request, jira_ticket_data)
+    items concurrently, at most LLM_CONCURRENCY at a time. Results keep input order.
+    Items with identical prompt inputs (cherry-picks, re-runs) are generated once.
+    A failed item comes back as its exception instead of failing the whole batch.
+    """
+    async def generate(formatted_llm_data, request, jira_ticket_data=None):
+        async with LLM_CONCURRENCY:
+            return await generate_documentation_with_llm(formatted_llm_data, request, jira_ticket_data)
+
+    # Keyed like generate_documentation_with_llm, which picks the model per request type
+    keys = [documentation_cache_key(_get_handler(item[1])[3], *item) for item in items]
+    unique = {}
+    for key, item in zip(keys, items):
+        unique.setdefault(key, item)
+
+    outcomes = await asyncio.gather(*(generate(*item) for item in unique.values()), return_exceptions=True)
+    results = dict(zip(unique, outcomes))
+
+    # The first occurrence gets the result; later ones get their own copy with zero usage
+    batch, seen = [], set()
+    for key in keys:
+        result = results[key]
+        if key in seen and isinstance(result, dict):
+            result = deduplicated_copy(result)
+        seen.add(key)
+        batch.append(result)
+    return batch
+
+
+@functools.lru_cache(maxsize=1)
+def init_vertex():
+    """
+    Import and initialise Vertex AI on first use rather than at import: the SDK
+    is slow to load and its init resolves credentials.
+    """
+    import vertexai
+    vertexai.init(project=GOOGLE_CLOUD_PROJECT, location=GOOGLE_CLOUD_LOCATION)
 
+
+@functools.lru_cache(maxsize=None)
 def setup_llm_mr_gitlab():
     """Configure Gemini LLM for GitLab MR analysis with Jira context"""
     
+    init_vertex()
+    from vertexai.generative_models import GenerativeModel, GenerationConfig
+
     generation_config = GenerationConfig(
         temperature=0.3,
         max_output_tokens=28192,
     )
     
     model = GenerativeModel(
-        "gemini-2.5-flash",
-        generation_config=generation_config
+        MODEL_NAME,
+        generation_config=generation_config,
+        system_instruction=MR_INSTRUCTIONS
     )
     
     return model
 
 
+@functools.lru_cache(maxsize=None)
 def setup_llm_release_notes():
     """Configure Gemini LLM for generating executive-ready release notes from MR summaries"""
     
+    init_vertex()
+    from vertexai.generative_models import GenerativeModel, GenerationConfig
+
     generation_config = GenerationConfig(
         temperature=0.3,
         max_output_tokens=28192,
     )
     
     model = GenerativeModel(
-        "gemini-2.5-flash",
-        generation_config=generation_config
+        RELEASE_NOTE_MODEL_NAME,
+        generation_config=generation_config,
+        system_instruction=RELEASE_NOTE_INSTRUCTIONS
     )
     
     return model
 
 
-def get_mr_prompt_template():
-    """Return the MR prompt template with all detailed instructions"""
-    
-    mr_prompt_text = """You are an expert Technical Writer and Product Communicator specializing in translating technical changes into business-focused documentation for C-suite executives and product leaders.
-
-## INPUT DATA STRUCTURE
-
-### Merge Request Context:
-- **Title:** {mr_title}
-- **Author:** {mr_author}
-- **Merged By:** {merged_by}
-- **Labels:** {labels}
-- **Description:** {mr_description}
-
-### Jira Ticket Context:
-{jira_context}
-
-### Code Changes Analysis:
-{formatted_commit_data}
-
-        ---
+# Prompts are plain format strings: Vertex takes the rendered text, so str.format
+# fills them in one C-level pass without a PromptTemplate in between
+MR_PROMPT_TEXT = """You are an expert Technical Writer and Product Communicator specializing in translating technical changes into business-focused documentation for C-suite executives and product leaders.
 
 ## YOUR TASK: Generate Leadership-Ready MR Documentation
 
-**Critical Instruction:** Base your analysis EXCLUSIVELY on the provided data above. Do not invent information, but DO extract and synthesize business value from what IS provided.
+**Critical Instruction:** Base your analysis EXCLUSIVELY on the INPUTS section at the end. Do not invent information, but DO extract and synthesize business value from what IS provided.
 
 **About Metrics:** If performance/productivity metrics are not explicitly stated in the source material, infer them from code changes. For example:
 - Caching implementation → "Eliminates redundant data fetches"
@@ -217,27 +268,27 @@ Answer these questions based on provided context:
 Create a structured list. **Only include categories where you have concrete evidence in the source data:**
 
 **Performance Improvement (if applicable):**
-- Analyze {formatted_commit_data} for: caching, query optimization, algorithm improvements, lazy loading, parallel processing
+- Analyze the Code Changes Analysis for: caching, query optimization, algorithm improvements, lazy loading, parallel processing
 - State what's faster/more efficient, and HOW you know (e.g., "fewer database calls", "reduces file I/O", "removes N+1 query problem")
 - Example: ✅ "Eliminates redundant API calls by caching user profiles" (NOT ❌ "improves performance")
 
 **Increased Productivity (if applicable):**
-- Analyze {mr_description} and {jira_context} for: automation, removing manual steps, reducing friction
+- Analyze the MR description and the Jira Ticket Context for: automation, removing manual steps, reducing friction
 - State what work is eliminated or accelerated
 - Example: ✅ "Removes requirement to manually validate report formats before sending to customers" (NOT ❌ "saves time")
 
 **User Adoption & Experience (if applicable):**
-- Analyze {mr_description} for: usability improvements, feature requests fulfilled, removed blockers
+- Analyze the MR description for: usability improvements, feature requests fulfilled, removed blockers
 - State what problem the user no longer faces
 - Example: ✅ "Eliminates timeout errors that previously occurred when generating reports for datasets >100K records" (NOT ❌ "improves user experience")
 
 **Cost/Resource Impact (if applicable):**
-- Analyze {formatted_commit_data} for: infrastructure optimization, reduced computational load, decreased storage
+- Analyze the Code Changes Analysis for: infrastructure optimization, reduced computational load, decreased storage
 - State resource savings or efficiency gains with specificity
 - Example: ✅ "Reduces server memory usage from X MB to Y MB per request" OR "Eliminates redundant compute jobs running hourly"
 
 **Risk Reduction (if applicable):**
-- Analyze {labels} and {mr_description} for: security patches, data integrity improvements, error handling
+- Analyze the MR labels and the MR description for: security patches, data integrity improvements, error handling
 - State what failure mode is prevented
 - Example: ✅ "Prevents data loss by adding transaction rollback on report generation failure" (NOT ❌ "improves reliability")
 
@@ -266,7 +317,7 @@ Use a bulleted list (max 5 points). Describe in terms of **user problems solved*
 - Example: ✅ "Eliminates need for manual job scheduling; automatic scaling now handles peak load periods"
 
 ### 5. SCOPE & BOUNDARIES
-Analyze {formatted_commit_data} for files modified. Analyze {mr_description} and {jira_context} for scope statements.
+Analyze the Code Changes Analysis for files modified. Analyze the MR description and the Jira Ticket Context for scope statements.
 
 - **In Scope:** [What IS included in this change - be specific about systems/features/modules]
   - Example: ✅ "Report generation pipeline, CI/CD workflow, caching layer for user profiles"
@@ -281,7 +332,7 @@ Analyze {formatted_commit_data} for files modified. Analyze {mr_description} and
   - Example: ✅ "Sales team, Finance department, Internal reporting operations"
 
 ### 6. RISK ASSESSMENT & MITIGATION
-Analyze {formatted_commit_data} to understand scope. Analyze {mr_description} for testing information.
+Analyze the Code Changes Analysis to understand scope. Analyze the MR description for testing information.
 
 **Risk Assessment Rules:**
 - **Scope of Changes:** More files modified = higher risk. Critical systems = higher impact
@@ -300,14 +351,14 @@ Analyze {formatted_commit_data} to understand scope. Analyze {mr_description} fo
 | Performance degradation during concurrent report generation | Low | Medium | Code optimization removes N+1 queries, reducing database load; load testing completed for 100+ concurrent users |
 
 ### 7. ACCEPTANCE & COMPLETION
-Extract from {jira_context}:
+Extract from the Jira Ticket Context:
 - **Jira Status:** [Extract from jira_context - current status]
 - **Assignee:** [Extract from jira_context - assignee_name]
 - **Definition of Done:** [Extract from Jira description if acceptance criteria are mentioned - specific testing, deployment requirements, documentation needs]
   - If not mentioned: Simply omit this field
 
 ### 8. RELATED INFORMATION
-Extract from {jira_context} and analyze {formatted_commit_data}:
+Extract from the Jira Ticket Context and analyze the Code Changes Analysis:
 
 - **Jira Key:** [Extract from jira_context - key field]
 - **Project:** [Extract from jira_context - project_name]
@@ -371,7 +422,7 @@ Extract from {jira_context} and analyze {formatted_commit_data}:
 
 ## ANALYSIS INSTRUCTIONS FOR LLM
 
-When analyzing {formatted_commit_data}, look for these patterns:
+When analyzing the Code Changes Analysis, look for these patterns:
 
 **Performance Patterns:**
 - Caching added → Eliminates redundant data fetches
@@ -428,41 +479,36 @@ This enables release note generators to:
 - Build category-specific release notes (features vs fixes vs enhancements)
 - Pull risk assessments for deployment planning
 - Create stakeholder communications with clear user benefits
-"""
-    
-    return PromptTemplate(
-        input_variables=[
-            "mr_title", 
-            "mr_author", 
-            "merged_by", 
-            "labels", 
-            "mr_description", 
-            "jira_context",
-            "formatted_commit_data"
-        ],
-        template=mr_prompt_text
-    )
 
+---
+INPUTS:
 
-def get_release_prompt_template():
-    """Return the Release Note prompt template with all detailed instructions"""
-    
-    release_note_prompt_text = """You are an expert Release Note Crafter specializing in translating technical changes into executive-ready communications for C-suite, product leaders, and stakeholders.
+### Merge Request Context:
+- **Title:** {mr_title}
+- **Author:** {mr_author}
+- **Merged By:** {merged_by}
+- **Labels:** {labels}
+- **Description:** {mr_description}
 
-Your task is to synthesize a collection of individual merge request (MR) summaries into a single, cohesive, professional, and strategic release note.
+### Jira Ticket Context:
+{jira_context}
 
-## Release Information:
-- **Release Tag:** {release_tag}
-- **Release Name:** {release_name}
-- **Project Name:** {project_name}
-- **Total MRs Included:** {total_mrs}
+### Code Changes Analysis:
+{formatted_commit_data}
+"""
 
-## Source Material: Merge Request Summaries
-Below are the complete business-focused summaries for each merge request in this release. Each includes: change classification, executive summary, business value, scope, risks, and completion status.
+# Static MR instructions go out as the system instruction and every variable sits
+# in the INPUTS tail, so each MR shares one cacheable prefix
+MR_INSTRUCTIONS, _, MR_INPUTS_TEXT = MR_PROMPT_TEXT.partition("\n---\nINPUTS:\n")
+
+MR_PROMPT = "INPUTS:\n" + MR_INPUTS_TEXT
 
----
-{formatted_llm_data}
----
+
+# Static release note instructions, sent as the system instruction so every
+# release shares one cacheable prefix; only the INPUTS below vary per call
+RELEASE_NOTE_INSTRUCTIONS = """You are an expert Release Note Crafter specializing in translating technical changes into executive-ready communications for C-suite, product leaders, and stakeholders.
+
+Your task is to synthesize a collection of individual merge request (MR) summaries into a single, cohesive, professional, and strategic release note.
 
 ## YOUR TASK: Generate Executive Release Note
 
@@ -480,20 +526,16 @@ Below are the complete business-focused summaries for each merge request in this
 - Highlight strategic themes (e.g., "This release focuses on automation and team productivity")
 - Flag critical risks that affect release decisions
 
----
-
 ## OUTPUT FORMAT
 
 ### 1. RELEASE HEADER
 Use this exact format:
 
 # Release [Release Name] ([Release Tag])
-**Project:** {project_name}
+**Project:** [Project Name]
 **Release Date:** [Infer from MR data if available, otherwise "Ready for Release"]
 **Summary:** [1-sentence strategic theme of this release]
 
----
-
 ### 2. EXECUTIVE OVERVIEW (For C-Suite/Product Leaders)
 Write 2-3 paragraphs that answer:
 - **What is the strategic focus of this release?** (Analyze all MRs to identify theme: innovation, stability, performance, automation, user experience, cost reduction, risk mitigation)
@@ -503,8 +545,6 @@ Write 2-3 paragraphs that answer:
 
 **Tone:** Executive summary for VP/CTO level. Lead with impact, not features.
 
----
-
 ### 3. KEY METRICS & IMPACT SUMMARY
 Synthesize quantifiable benefits from the MR summaries. Only include if data is provided in source material.
 
@@ -520,8 +560,6 @@ Synthesize quantifiable benefits from the MR summaries. Only include if data is
 - Don't invent numbers or say "expected to save" unless stated in MRs
 - If no metrics available: Skip this section
 
----
-
 ### 4. CATEGORIZED CHANGES (Business-Focused)
 Read through all MR summaries and group them by **business impact category** (NOT technical type).
 
@@ -557,8 +595,6 @@ Format:
 - Productivity gain: [What work is no longer needed]
 - Teams impacted: [Team 1, Team 2]
 
----
-
 ### 5. SCOPE & AFFECTED SYSTEMS
 Synthesize from MR data to show what's changing and what's NOT.
 
@@ -572,8 +608,6 @@ Synthesize from MR data to show what's changing and what's NOT.
 
 **Breaking Changes:** [List any, or state "None"]
 
----
-
 ### 6. RISK & MITIGATION SUMMARY (For Decision-Making)
 
 **Production Risk Level:** [LOW / MEDIUM / HIGH]
@@ -595,8 +629,6 @@ If none: State "None identified"
 **Production Readiness:** [Ready for Production / Not Recommended / Conditional]
 - [Brief rationale based on risk and testing completeness from MR data]
 
----
-
 ### 7. STAKEHOLDER IMPACT & RECOMMENDED ACTIONS
 
 **Affected Teams & What They Should Expect:**
@@ -610,11 +642,9 @@ If none: State "None identified"
 **Training or Communication Needed:**
 - [Area]: [What communication is needed, or "None"]
 
----
-
 ## KEY SYNTHESIS RULES
 
-When reading {formatted_llm_data}:
+When reading the merge request summaries:
 
 **Pattern Recognition:**
 - Count by category: "This release includes 3 performance improvements, 2 new features, and 1 stability fix"
@@ -636,8 +666,6 @@ When reading {formatted_llm_data}:
 - Mitigations: What safeguards are in place
 - Business impact: What happens if this goes wrong
 
----
-
 ## LANGUAGE & TONE
 
 **For C-Suite/Executive Audience:**
@@ -647,22 +675,12 @@ When reading {formatted_llm_data}:
 - Focus on risk and readiness, not implementation details
 - Assume zero technical knowledge of internal processes
 
-**What to EXCLUDE for Leadership:**
-- ❌ Staging environment details
-- ❌ CI/CD pipeline specifics
-- ❌ Internal verification checklists
-- ❌ DevOps procedures
-- ❌ Testing methodologies
-- ❌ Status labels like "In Progress" or "Pending"
-
 **What to INCLUDE for Leadership:**
-- ✅ Business outcomes
-- ✅ Team productivity gains
-- ✅ Risk to business operations
-- ✅ Production readiness (Yes/No/Conditional)
-- ✅ Affected teams and their actions
-
----
++ Business outcomes
++ Team productivity gains
++ Risk to business operations
++ Production readiness (Yes/No/Conditional)
++ Affected teams and their actions
 
 ## OUTPUT STRUCTURE (Leadership-Ready)
 
@@ -676,23 +694,42 @@ Return release note in this exact order:
 7. Stakeholder Impact & Recommended Actions
 
 **DO NOT INCLUDE:**
-- ❌ FINAL VERIFICATION CHECKLIST
-- ❌ TIMELINE & MILESTONES with staging details
-- ❌ SUPPORT & ROLLBACK PLAN (too technical for leadership)
-- ❌ Deployment procedures
-- ❌ Testing status
+- Staging environment details
+- CI/CD pipeline specifics
+- Internal verification checklists, including a FINAL VERIFICATION CHECKLIST
+- TIMELINE & MILESTONES with staging details
+- SUPPORT & ROLLBACK PLAN (too technical for leadership)
+- DevOps or deployment procedures
+- Testing methodologies or testing status
+- Status labels like "In Progress" or "Pending"
 """
-    
-    return PromptTemplate(
-        input_variables=[
-            "release_tag",
-            "release_name",
-            "project_name",
-            "total_mrs",
-            "formatted_llm_data"
-        ],
-        template=release_note_prompt_text
-    )
+
+RELEASE_NOTE_PROMPT = """INPUTS:
+
+## Release Information:
+- **Project Name:** {project_name}
+- **Release Tag:** {release_tag}
+- **Release Name:** {release_name}
+- **Total MRs Included:** {total_mrs}
+
+## Source Material: Merge Request Summaries
+Below are the complete business-focused summaries for each merge request in this release. Each includes: change classification, executive summary, business value, scope, risks, and completion status. A summary listing several SHAs covers merge requests with identical documentation.
+
+---
+{formatted_llm_data}
+"""
+
+
+# Jira fields rendered into the prompt, in order, with their labels
+JIRA_CONTEXT_FIELDS = (
+    ("key", "Ticket ID"),
+    ("project_name", "Project"),
+    ("summary", "Summary"),
+    ("description", "Description"),
+    ("assignee_name", "Assignee"),
+    ("status_name", "Status"),
+    ("resolution", "Resolution"),
+)
 
 
 def build_jira_context(jira_data: JiraTicket):
@@ -710,34 +747,15 @@ def build_jira_context(jira_data: JiraTicket):
     if not jira_data:
         return "[No Jira ticket linked]"
     
-    context_parts = []
-    data = jira_data.model_dump()  # Convert to dict
-    
-    # Required fields
-    if data.get('key'):
-        context_parts.append(f"**Ticket ID:** {data['key']}")
-
-    if data.get('project_name'):
-        context_parts.append(f"**Project:** {data['project_name']}")
-
-    if data.get('summary'):
-        context_parts.append(f"**Summary:** {data['summary']}")
-    
-    # Optional fields
-    if data.get('description'):
-        context_parts.append(f"**Description:** {data['description']}")
-
-    if data.get('assignee_name'):
-        context_parts.append(f"**Assignee:** {data['assignee_name']}")
-
-    if data.get('status_name'):
-        context_parts.append(f"**Status:** {data['status_name']}")
-
-    if data.get('resolution'):
-        context_parts.append(f"**Resolution:** {data['resolution']}")
+    # Read attributes straight off the model; a model_dump() copy isn't needed
+    context = "\n".join(
+        f"**{label}:** {value}"
+        for attr, label in JIRA_CONTEXT_FIELDS
+        if (value := getattr(jira_data, attr, None))
+    )
 
     # Return formatted context or placeholder if no data
-    return "\n".join(context_parts) if context_parts else "[No Jira ticket linked]"
+    return context or "[No Jira ticket linked]"
 
 
 # Usage example:
@@ -747,9 +765,7 @@ def generate_mr_summary(mr_data: dict, jira_data: Optional[JiraTicket], commit_d
     """
     jira_context = build_jira_context(jira_data) if jira_data else "[No Jira ticket linked]"
     
-    mr_prompt_template = get_mr_prompt_template()
-    
-    prompt_text = mr_prompt_template.format(
+    prompt_text = MR_PROMPT.format(
         mr_title=mr_data.get("title", ""),
         mr_author=mr_data.get("author", ""),
         merged_by=mr_data.get("merged_by", ""),
@@ -761,4 +777,11 @@ def generate_mr_summary(mr_data: dict, jira_data: Optional[JiraTicket], commit_d
     
     model = setup_llm_mr_gitlab()
     response = model.generate_content(prompt_text)
-    return response.text
\ No newline at end of file
+    return response.text
+
+
+# Prompt builder, model setup, result key and model name for each supported request type
+_HANDLERS = {
+    MRDocumentationRequest: (_mr_prompt, setup_llm_mr_gitlab, "mr_documentation", MODEL_NAME),
+    ReleaseNoteRequest: (_release_note_prompt, setup_llm_release_notes, "release_note", RELEASE_NOTE_MODEL_NAME),
+}
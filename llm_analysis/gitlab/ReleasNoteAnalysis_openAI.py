@@ -2,7 +2,7 @@ import os
 import asyncio
 import openai
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
+from common.executors import EXECUTOR as executor
 from models.gitlab.ReleaseNoteRequest import ReleaseNoteRequest
 
 load_dotenv()
@@ -15,9 +15,6 @@ os.environ['AZURE_OPENAI_API_KEY'] = os.environ.get('AZURE_OPENAI_API_KEY')
 # Create OpenAI client
 client = openai.AzureOpenAI()
 
-# Thread pool for async operations
-executor = ThreadPoolExecutor(max_workers=5)
-
 async def generate_release_note_with_llm(documentation_data, release_note_request: ReleaseNoteRequest):
     """Generate release note using Azure OpenAI"""
     
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+import threading
+import unicodedata
+from cachetools import TTLCache
+from models.gitlab.MRDocumentationRequest import MRDocumentationRequest
+
+# Generated documents by prompt fingerprint; replays of the same MR or release
+# (retries, regenerate requests) are answered without another LLM call
+_RESPONSE_CACHE = TTLCache(maxsize=256, ttl=24 * 60 * 60)
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+_NO_TOKENS = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+
+def canonical_text(value) -> str:
+    """NFC-normalise and strip a free-text prompt field; None becomes an empty string"""
+    if value is None:
+        return ""
+    return unicodedata.normalize("NFC", str(value)).strip()
+
+
+def canonical_labels(labels) -> str:
+    """Render labels in a fixed order so GitLab's label ordering doesn't change the prompt"""
+    return ", ".join(sorted(canonical_text(label) for label in labels or []))
+
+
+def _canonical(value):
+    """Collapse whitespace in every metadata string so cosmetic edits don't change the key"""
+    if isinstance(value, str):
+        return " ".join(unicodedata.normalize("NFC", value).split())
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def documentation_cache_key(model: str, formatted_llm_data, request, jira_ticket_data=None) -> str:
+    """
+    Fingerprint everything that goes into the prompt for an MR or a release note.
+    Only metadata is whitespace-collapsed: the diff or documents payload is hashed
+    as sent (NFC only), since indentation and line breaks there are real changes.
+    """
+    if isinstance(request, MRDocumentationRequest):
+        metadata = {
+            "kind": "mr",
+            "title": request.title,
+            "author": request.author,
+            "merged_by": request.merged_by,
+            "labels": canonical_labels(request.labels),
+            "description": request.description,
+            "jira": jira_ticket_data.model_dump() if jira_ticket_data else None,
+        }
+        content = formatted_llm_data
+    else:
+        metadata = {
+            "kind": "release",
+            "release_tag": request.release_tag,
+            "release_name": request.release_name,
+            "project_name": request.project_name,
+            "total_mrs": formatted_llm_data['total_documents'],
+        }
+        content = formatted_llm_data['formatted_text']
+    metadata["model"] = model
+
+    inputs = {**_canonical(metadata), "content": unicodedata.normalize("NFC", content or "")}
+    payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get_cached_response(key: str):
+    """
+    Return a copy of the cached LLM result for a key, or None.
+    A hit spends no tokens, so it reports zero usage and is flagged with cache_hit.
+    """
+    with _RESPONSE_CACHE_LOCK:
+        result = _RESPONSE_CACHE.get(key)
+    if result is None:
+        return None
+    return {**result, "token_usage": dict(_NO_TOKENS), "cache_hit": True}
+
+
+def cache_response(key: str, result: dict):
+    """Remember a successful LLM result under its prompt fingerprint"""
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = result
+
+
+def deduplicated_copy(result: dict) -> dict:
+    """
+    A separate copy of a result shared with a duplicate request. The model call is
+    reported once, by whoever made it, so the copy carries zero token usage.
+    """
+    return {**result, "token_usage": dict(_NO_TOKENS), "deduplicated": True}
+
+
+# Generations currently running, by prompt fingerprint; all on the app's event loop
+_IN_FLIGHT = {}
+
+
+class _LeaderCancelled(Exception):
+    """Set on an in-flight future when the call generating it was cancelled"""
+
+
+async def single_flight(key: str, generate):
+    """
+    Await generate() once per key at a time. Callers that arrive while the same
+    prompt is already being generated (duplicate MRs in one release) wait for that
+    call and get its result, flagged with deduplicated and with zero token usage,
+    instead of calling the model again.
+    If that call is cancelled (its client went away), a waiter takes over and runs generate() itself.
+    """
+    while (future := _IN_FLIGHT.get(key)) is not None:
+        try:
+            return deduplicated_copy(await asyncio.shield(future))
+        except _LeaderCancelled:
+            # The first waiter to resume finds no call in flight and becomes the leader
+            continue
+
+    future = asyncio.get_running_loop().create_future()
+    _IN_FLIGHT[key] = future
+    try:
+        result = await generate()
+    except asyncio.CancelledError:
+        # Only this caller was cancelled; waiters retry rather than inherit it
+        future.set_exception(_LeaderCancelled())
+        future.exception()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Waiters re-raise it; mark it retrieved so an unawaited future isn't logged
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _IN_FLIGHT[key]
@@ -0,0 +1,46 @@
+import functools
+import tiktoken
+
+# Largest diff sent for one MR, and largest set of MR docs sent for one release
+MR_DIFF_TOKEN_BUDGET = 8000
+RELEASE_DOCS_TOKEN_BUDGET = 60000
+
+# Largest prompt sent to a 128K-context model, leaving room for the answer
+CONTEXT_TOKEN_LIMIT = 120_000
+
+
+@functools.lru_cache(maxsize=1)
+def get_encoding() -> tiktoken.Encoding:
+    """
+    The cl100k_base BPE encoding, loaded on first use rather than at import:
+    tiktoken downloads the file unless TIKTOKEN_CACHE_DIR already holds it.
+    """
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def fit_to_token_budget(text: str, max_tokens: int) -> str:
+    """
+    Trim text to max_tokens, keeping its head and tail around a truncation marker.
+    Deterministic, so the same input always produces the same prompt.
+    """
+    # Byte-level BPE never yields more tokens than UTF-8 bytes; skip encoding small texts
+    if not text or len(text.encode("utf-8")) <= max_tokens:
+        return text
+
+    encoding = get_encoding()
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+
+    half = max_tokens // 2
+    dropped = len(tokens) - 2 * half
+    return (
+        encoding.decode(tokens[:half])
+        + f"\n...[truncated {dropped} tokens]...\n"
+        + encoding.decode(tokens[-half:])
+    )
+
+
+def count_tokens(text: str) -> int:
+    """Number of cl100k_base tokens in text"""
+    return len(get_encoding().encode(text, disallowed_special=())) if text else 0
@@ -19,6 +19,7 @@ class MRDocumentationRequest(BaseModel):
     description: Optional[str] = Field(default="")
     author: Optional[str] = Field(default=None)
     assignees: List[str] = Field(default_factory=list)
+    jira_key: Optional[str] = Field(default=None, description="Jira ticket key linked to the merge request")
     
     
     @field_validator('labels', mode='before')
@@ -1,10 +1,10 @@
 import os
-from typing import Optional
+import asyncio
+from typing import List, Optional
 from venv import create
-from pydantic import ValidationError
 import requests
 from dotenv import load_dotenv
-from llm_analysis.gitlab.DocumentationAnalysis_gemini import generate_documentation_with_llm
+from llm_analysis.gitlab.DocumentationAnalysis_gemini import LLM_CONCURRENCY, generate_documentation_with_llm
 # from llm_analysis.gitlab.DocumentationAnalysis_gemini import generate_documentation_with_llm
 from models.gitlab.CommitModels import CommitResponse
 from gcs_storage.MRDocumentationStorage import upload_mr_documentation
@@ -19,37 +19,71 @@ load_dotenv()
 
 GITLAB_TOKEN = os.getenv("GITLAB_TOKEN")
 
+# Longest diff kept per file, so one huge file (lockfile, generated code) cannot
+# crowd the rest of the MR out of the prompt's token budget
+MAX_DIFF_LINES_PER_FILE = 300
 
-def process_merge_request_from_cicd(payload_data: dict):
+
+async def process_merge_request_from_cicd(mr_request: MRDocumentationRequest):
     """
-    Process MR - CI/CD provides minimal data, service fetches the rest
+    Process MR - CI/CD provides minimal data, service fetches the rest.
+    Blocking GitLab/Jira/GCS/LLM calls are pushed to worker threads so the
+    event loop keeps serving other requests.
     """
-    try:
-        # Validate minimal payload from CI/CD
-        mr_request = MRDocumentationRequest.model_validate(payload_data)
+    # Find MR IID reliably using GitLab API
+    mr_iid = await asyncio.to_thread(find_mr_by_commit_sha, mr_request.project_id, mr_request.commit_sha)
 
-        # Find MR IID reliably using GitLab API
-        mr_iid = find_mr_by_commit_sha(mr_request.project_id, mr_request.commit_sha)
+    # If we have project_id and mr_iid, fetch complete MR details
+    if mr_request.project_id and mr_iid and mr_iid > 0:
+        complete_mr_data = await asyncio.to_thread(enrich_mr_data_from_api, mr_request, mr_iid)
+    else:
+        complete_mr_data = mr_request
+    
+    logger.debug("MR documentation request: %s", mr_request)
 
-        # If we have project_id and mr_iid, fetch complete MR details
-        if mr_request.project_id and mr_iid and mr_iid > 0:
-            complete_mr_data = enrich_mr_data_from_api(mr_request, mr_iid)
-        else:
-            complete_mr_data = mr_request
-        
-        print(payload_data)
+    jira_ticket_data = await asyncio.to_thread(JiraHelper.get_ticket, ticket_key=mr_request.jira_key)
+
+    # Process documentation
+    result = await create_mr_documentation(complete_mr_data, jira_ticket_data)
+    logger.debug("Generated MR documentation:\n%s", result["mr_documentation"])
+    if result:
+        await asyncio.to_thread(upload_mr_documentation, complete_mr_data, result["mr_documentation"])
+    return result
 
-        jira_ticket_data = JiraHelper.get_ticket(ticket_key=payload_data.get("jira_key"))
 
-        # Process documentation
-        result = create_mr_documentation(complete_mr_data, jira_ticket_data)
-        print(result["mr_documentation"])
-        if result:
-            upload_mr_documentation(complete_mr_data, result["mr_documentation"])
-        return result
+async def process_merge_requests_batch(mr_requests: List[MRDocumentationRequest]) -> List[dict]:
+    """
+    Process several MRs concurrently. Failures are reported per item so one
+    bad MR does not fail the rest of the batch.
+    """
+    outcomes = await asyncio.gather(
+        *(process_merge_request_from_cicd(mr_request) for mr_request in mr_requests),
+        return_exceptions=True,
+    )
 
-    except ValidationError as e:
-        raise InvalidMergeRequest(f"Invalid MR request data: {e}")
+    results = []
+    for mr_request, outcome in zip(mr_requests, outcomes):
+        if isinstance(outcome, AppError):
+            logger.error(f"Batch item for commit {mr_request.commit_sha} failed: {outcome}")
+            results.append({
+                "commit_sha": mr_request.commit_sha,
+                "status": "error",
+                "status_code": outcome.status_code,
+                "message": outcome.message,
+                "details": str(outcome),
+            })
+        elif isinstance(outcome, Exception):
+            logger.error(f"Batch item for commit {mr_request.commit_sha} failed: {outcome}", exc_info=outcome)
+            results.append({
+                "commit_sha": mr_request.commit_sha,
+                "status": "error",
+                "status_code": 500,
+                "message": "An unexpected error occurred",
+                "details": str(outcome),
+            })
+        else:
+            results.append({"commit_sha": mr_request.commit_sha, **outcome})
+    return results
 
 
 def find_mr_by_commit_sha(project_id: int, commit_sha: str) -> Optional[int]:
@@ -140,7 +174,7 @@ def enrich_mr_data_from_api(
         ) from e
 
 
-def create_mr_documentation(mr_data, jira_ticket_data):
+async def create_mr_documentation(mr_data, jira_ticket_data):
     """
     Main function to create MR documentation by:
     1. Fetching all commits in the MR
@@ -152,12 +186,12 @@ def create_mr_documentation(mr_data, jira_ticket_data):
     project_id = mr_data.project_id
     mr_iid = mr_data.mr_iid
     # Step 1: Fetch list of commits in MR from GitLab API
-    commit_data = get_list_of_commits(project_id, mr_iid)
+    commit_data = await asyncio.to_thread(get_list_of_commits, project_id, mr_iid)
     if not commit_data or not commit_data.commits:
         raise NoCommitsForMRError(f"No commits found for MR {mr_iid} in project {project_id}")
 
     # Step 2: Enhance each commit with its diff data
-    commits_with_diffs = enrich_commits_with_diffs(project_id, commit_data.commits)
+    commits_with_diffs = await asyncio.to_thread(enrich_commits_with_diffs, project_id, commit_data.commits)
 
     # Step 3: Format all data for LLM consumption
     llm_formatted_data = format_commits_for_llm(
@@ -165,7 +199,11 @@ def create_mr_documentation(mr_data, jira_ticket_data):
     )
 
     # Step 4: Send to LLM for documentation generation (placeholder for now)
-    mr_documentation = generate_documentation_with_llm(llm_formatted_data, mr_data, jira_ticket_data)
+    # Batch requests run many of these at once; keep the LLM fan-out bounded
+    async with LLM_CONCURRENCY:
+        mr_documentation = await generate_documentation_with_llm(
+            llm_formatted_data, mr_data, jira_ticket_data
+        )
 
     return {
         "status": "success",
@@ -206,7 +244,7 @@ def enrich_commits_with_diffs(project_id: str, commits: list) -> list:
 
     for i, commit in enumerate(commits, 1):
 
-        print(f"Fetching diff for commit {i}/{len(commits)}: {commit.short_id}")
+        logger.debug("Fetching diff for commit %s/%s: %s", i, len(commits), commit.short_id)
 
         # Fetch diff data for this specific commit
         commit_diff = get_commit_diff(project_id, commit.id)
@@ -354,13 +392,13 @@ FILE CHANGES:
                 )
                 formatted_output += f"  • {file_path} ({file_status})\n"
 
-            # Add actual diff content (you might want to truncate this for very large diffs)
+            # Add actual diff content, capped per file
             formatted_output += "\nDETAILED DIFF:\n"
             for file_diff in commit["diff_data"]:
                 file_path = file_diff.get(
                     "new_path", file_diff.get("old_path", "Unknown")
                 )
-                diff_content = file_diff.get("diff", "No diff content")
+                diff_content = shrink_file_diff(file_diff.get("diff") or "No diff content")
 
                 formatted_output += f"""
 File: {file_path}
@@ -379,6 +417,20 @@ File: {file_path}
     return formatted_output
 
 
+def shrink_file_diff(diff_content: str, max_lines: int = MAX_DIFF_LINES_PER_FILE) -> str:
+    """
+    Drop added/removed lines that are only whitespace and keep at most max_lines
+    of a file's diff, noting how many lines were left out.
+    """
+    lines = [
+        line for line in diff_content.split("\n")
+        if not (line[:1] in ("+", "-") and not line[1:].strip())
+    ]
+    if len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"... [{len(lines) - max_lines} more diff lines omitted]"]
+    return "\n".join(lines)
+
+
 def get_file_change_type(file_diff: dict) -> str:
     """
     Determine the type of change made to a file
@@ -1,34 +1,38 @@
 import os
 import re
-from typing import List
+import asyncio
+import logging
+from typing import AsyncIterator, List
 from dotenv import load_dotenv
 import requests
 from models.gitlab.ReleaseNoteRequest import ReleaseNoteRequest
 from gcs_storage.ReleaseNoteStorage import *
-from exception.exceptions import GitlabAPIError, MRDocumentationNotFoundError, MRNotFoundForReleaseError
+from exception.exceptions import AppError, GitlabAPIError, MRDocumentationNotFoundError, MRNotFoundForReleaseError
 # from llm_analysis.gitlab.ReleasNoteAnalysis_openAI import generate_release_note_with_llm
-from llm_analysis.gitlab.DocumentationAnalysis_gemini import generate_documentation_with_llm
+from llm_analysis.gitlab.DocumentationAnalysis_gemini import LLM_CONCURRENCY, generate_documentation_with_llm, stream_documentation_with_llm
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
 GITLAB_TOKEN = os.getenv("GITLAB_TOKEN")
 
-def process_release_note_from_cicd(request: dict):
-
-        # Convert request to ReleaseNoteRequest model
-        release_note_request = ReleaseNoteRequest.model_validate(request)
-
+async def process_release_note_from_cicd(release_note_request: ReleaseNoteRequest):
 
         #Find Release details using GitLab API and returns a enriched ReleaseNoteRequest object
-        complete_release_note_request = find_release_by_tag(release_note_request)
+        complete_release_note_request = await asyncio.to_thread(find_release_by_tag, release_note_request)
 
         
 
         # Create release note
-        result = create_release_note(complete_release_note_request)
+        result = await create_release_note(complete_release_note_request)
         
         if result:
-            upload_release_note(release_note_request, result['release_note_content'], result['mr_sha'])
+            # Documents read for the note; internal to the move, not part of the response
+            blob_names = result.pop('documented_blobs')
+            await upload_release_note(
+                release_note_request, result['release_note_content'], result['mr_sha'], blob_names
+            )
         
         # return {
         #     "message": "Release Note generated successfully",
@@ -42,6 +46,67 @@ def process_release_note_from_cicd(request: dict):
 
         return result
 
+
+async def process_release_notes_batch(release_note_requests: List[ReleaseNoteRequest]) -> List[dict]:
+    """
+    Generate release notes for several releases concurrently (e.g. a backfill).
+    Model calls share LLM_CONCURRENCY with every other request, and failures are
+    reported per item so one bad release does not fail the rest of the batch.
+    """
+    outcomes = await asyncio.gather(
+        *(process_release_note_from_cicd(release_note_request) for release_note_request in release_note_requests),
+        return_exceptions=True,
+    )
+
+    results = []
+    for release_note_request, outcome in zip(release_note_requests, outcomes):
+        if isinstance(outcome, AppError):
+            logger.error("Batch item for release %s failed: %s", release_note_request.release_tag, outcome)
+            results.append({
+                "release_tag": release_note_request.release_tag,
+                "status": "error",
+                "status_code": outcome.status_code,
+                "message": outcome.message,
+                "details": str(outcome),
+            })
+        elif isinstance(outcome, Exception):
+            logger.error("Batch item for release %s failed: %s", release_note_request.release_tag, outcome, exc_info=outcome)
+            results.append({
+                "release_tag": release_note_request.release_tag,
+                "status": "error",
+                "status_code": 500,
+                "message": "An unexpected error occurred",
+                "details": str(outcome),
+            })
+        else:
+            results.append(outcome)
+    return results
+
+
+async def stream_release_note_from_cicd(release_note_request: ReleaseNoteRequest) -> AsyncIterator[str]:
+    """
+    Resolve the release and gather its MR documentation, then return an iterator
+    over the release note text as the LLM writes it. Lookup errors are raised here,
+    before any of the response has been sent.
+    """
+    complete_release_note_request = await asyncio.to_thread(find_release_by_tag, release_note_request)
+    mr_in_release, documentation = await collect_release_documentation(complete_release_note_request)
+    return _stream_and_upload_release_note(complete_release_note_request, mr_in_release, documentation)
+
+
+async def _stream_and_upload_release_note(release_note_request: ReleaseNoteRequest, mr_in_release: set, documentation: dict) -> AsyncIterator[str]:
+    chunks = []
+    # Held for the whole stream, so streamed notes count against the same Vertex quota
+    async with LLM_CONCURRENCY:
+        async for chunk in stream_documentation_with_llm(documentation, release_note_request):
+            chunks.append(chunk)
+            yield chunk
+
+    # Store the note only once it is complete
+    await upload_release_note(
+        release_note_request, "".join(chunks), list(mr_in_release), documentation['blob_names']
+    )
+
     
 def find_release_by_tag(release_note_request: ReleaseNoteRequest) -> ReleaseNoteRequest:
     """
@@ -57,15 +122,11 @@ def find_release_by_tag(release_note_request: ReleaseNoteRequest) -> ReleaseNote
         if response.status_code == 200:
             release_data = response.json()
 
-
-            # print(f"Release data from gitlab:\n",release_data)
-
             # Update existing object with API data
             release_note_request.release_name = release_data.get("name")
             release_note_request.description = release_data.get("description")
             release_note_request.release_url = release_data.get("web_url")
-
-            # print(f"Release Note Request: {release_note_request}")
+            logger.debug("Release request enriched from GitLab: %s", release_note_request)
 
             return release_note_request
         else:
@@ -82,41 +143,52 @@ def find_release_by_tag(release_note_request: ReleaseNoteRequest) -> ReleaseNote
         raise GitlabAPIError("A network error occurred while contacting GitLab") from e
     
 
-def create_release_note(release_note_request: ReleaseNoteRequest):
+async def collect_release_documentation(release_note_request: ReleaseNoteRequest):
+    """Find the MRs in a release and load their stored documentation"""
+    # Get MR commit SHAs based on release type
+    if release_note_request.is_first_release:
+        logger.info(f"Processing first release: {release_note_request.release_tag}")
+        mr_in_release = await asyncio.to_thread(
+            get_all_mrs_to_main_for_first_release, release_note_request.project_id
+        )
+        logger.info(f"Found {len(mr_in_release)} MRs for first release")
+        
+    else:
+        logger.info(f"Processing release between tags: {release_note_request.previous_release_tag} -> {release_note_request.release_tag}")
+        mr_in_release = await asyncio.to_thread(
+            get_mrs_between_tags,
+            release_note_request.project_id,
+            release_note_request.previous_release_tag,
+            release_note_request.release_tag
+        )
+        logger.info(f"Found {len(mr_in_release)} MRs between tags")
+
+    if not mr_in_release:
+        raise MRNotFoundForReleaseError(f"No MR found for release {release_note_request.release_tag}")
+
+    # Get documentation for these MRs
+    logger.info("Fetching MR documentation from GCS...")
+    documentation = await get_MR_documentation(release_note_request, mr_in_release)
+
+    if not documentation or documentation.get('total_documents', 0) == 0:
+        raise MRDocumentationNotFoundError(f"No MR documentation found for release {release_note_request.release_tag}")
+
+    logger.info("Successfully retrieved documentation for %s MRs", documentation['total_documents'])
+    logger.info("Total estimated tokens: %s", documentation['estimated_tokens'])
+
+    return mr_in_release, documentation
+
+
+async def create_release_note(release_note_request: ReleaseNoteRequest):
     """Create release note by gathering MR documentation"""
     
     try:
-        # Get MR commit SHAs based on release type
-        if release_note_request.is_first_release:
-            logger.info(f"Processing first release: {release_note_request.release_tag}")
-            mr_in_release = get_all_mrs_to_main_for_first_release(release_note_request.project_id)
-            logger.info(f"Found {len(mr_in_release)} MRs for first release")
-            
-        else:
-            logger.info(f"Processing release between tags: {release_note_request.previous_release_tag} -> {release_note_request.release_tag}")
-            mr_in_release = get_mrs_between_tags(
-                release_note_request.project_id,
-                release_note_request.previous_release_tag,
-                release_note_request.release_tag
-            )
-            logger.info(f"Found {len(mr_in_release)} MRs between tags")
-
-        if not mr_in_release:
-            raise MRNotFoundForReleaseError(f"No MR found for release {release_note_request.release_tag}")
-        
-        # Get documentation for these MRs
-        logger.info("Fetching MR documentation from GCS...")
-        documentation = get_MR_documentation(release_note_request, mr_in_release)
-        
-        if not documentation or documentation.get('total_documents', 0) == 0:
-            raise MRDocumentationNotFoundError(f"No MR documentation found for release {release_note_request.release_tag}")
-        
-        print(f"Successfully retrieved documentation for {documentation['total_documents']} MRs")
-        print(f"Total estimated tokens: {documentation['estimated_tokens']}")
+        mr_in_release, documentation = await collect_release_documentation(release_note_request)
         
         # Process documentation with LLM to generate release note
-        print("Processing documentation with LLM...")
-        llm_result = generate_documentation_with_llm(documentation, release_note_request)
+        logger.info("Processing documentation with LLM...")
+        async with LLM_CONCURRENCY:
+            llm_result = await generate_documentation_with_llm(documentation, release_note_request)
         
         return {
             "status": "success",
@@ -135,7 +207,8 @@ def create_release_note(release_note_request: ReleaseNoteRequest):
                 "model_used": llm_result.get("model_used", "gpt-4-1106"),
                 "generation_successful": llm_result.get("generation_successful", False)
             },
-            "mr_sha": list(mr_in_release)
+            "mr_sha": list(mr_in_release),
+            "documented_blobs": documentation['blob_names']
         }
         
     except MRNotFoundForReleaseError as e:
@@ -235,7 +308,7 @@ def get_mrs_between_tags(project_id: int, from_tag: str, to_tag: str) -> set:
             if merge_commit_sha and merge_commit_sha in commit_shas:
                 relevant_merge_commits.add(merge_commit_sha)
         
-        print(f"Found {len(relevant_merge_commits)} merge commits between {from_tag} and {to_tag}")
+        logger.info("Found %s merge commits between %s and %s", len(relevant_merge_commits), from_tag, to_tag)
         return relevant_merge_commits
         
     except requests.HTTPError as e:
@@ -1,9 +1,12 @@
 import os
+import logging
 import requests
 from typing import Optional
 from dotenv import load_dotenv
 from models.jira_model import JiraTicket
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 BASE_URL = "https://tusharsoni1420014.atlassian.net/rest/api/2"
@@ -64,19 +67,19 @@ def get_ticket(ticket_key: str) -> Optional[JiraTicket]:
         return ticket
             
     except requests.exceptions.Timeout:
-        print(f"Error: Request timeout for ticket {ticket_key}")
+        logger.warning("Request timeout for ticket %s", ticket_key)
         return None
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 401:
-            print("Error: Authentication failed. Check JIRA credentials.")
+            logger.error("Authentication failed. Check JIRA credentials.")
         elif e.response.status_code == 404:
-            print(f"Error: Ticket {ticket_key} not found.")
+            logger.warning("Ticket %s not found.", ticket_key)
         else:
-            print(f"Error: HTTP {e.response.status_code} - {e.response.text}")
+            logger.error("HTTP %s - %s", e.response.status_code, e.response.text)
         return None
     except requests.exceptions.RequestException as e:
-        print(f"Error: Network error - {str(e)}")
+        logger.error("Network error - %s", e)
         return None
     except ValueError as e:
-        print(f"Error: Invalid response structure - {str(e)}")
+        logger.error("Invalid response structure - %s", e)
         return None
\ No newline at end of file
@@ -0,0 +1,21 @@
+import os
+import warnings
+from pathlib import Path
+
+# Modules read these at import time; tests never reach the real services
+os.environ.setdefault("GROQ_API_KEY", "test-groq-key")
+os.environ.setdefault("GITLAB_TOKEN", "test-gitlab-token")
+os.environ.setdefault("JIRA_EMAIL", "tests@example.com")
+os.environ.setdefault("JIRA_API_TOKEN", "test-jira-token")
+
+# Keep tiktoken's BPE file between runs, as the Docker image does
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(Path(__file__).resolve().parent.parent / ".cache" / "tiktoken"))
+
+
+def pytest_sessionstart(session):
+    """Warm the tiktoken cache once, so only the token-counting tests depend on it"""
+    from llm_analysis.token_budget import get_encoding
+    try:
+        get_encoding()
+    except Exception as e:
+        warnings.warn(f"cl100k_base encoding unavailable, token-counting tests will fail: {e}")
@@ -0,0 +1,61 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+from google.api_core import exceptions as gcs_exceptions
+from google.cloud.exceptions import NotFound
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.content_encoding = None
+
+    def upload_from_string(self, data, if_generation_match=None, **kwargs):
+        self.bucket.check(self.name)
+        if if_generation_match == 0 and self.name in self.bucket.objects:
+            raise gcs_exceptions.PreconditionFailed("object exists")
+        self.bucket.objects[self.name] = data
+
+    def download_as_text(self):
+        return self.bucket.objects[self.name]
+
+    def exists(self):
+        return self.name in self.bucket.objects
+
+    def delete(self):
+        if self.name not in self.bucket.objects:
+            raise NotFound(self.name)
+        del self.bucket.objects[self.name]
+
+
+class FakeBucket:
+    """
+    In-memory bucket honouring the create-only precondition. Writes to a name
+    starting with any of fail_prefixes raise ServiceUnavailable.
+    Batches apply each call immediately.
+    """
+
+    def __init__(self, name="1-demo", objects=None):
+        self.name = name
+        self.objects = dict(objects or {})
+        self.fail_prefixes = set()
+        self.client = SimpleNamespace(batch=nullcontext, bucket=lambda bucket_name: self)
+
+    def check(self, name):
+        if any(name.startswith(prefix) for prefix in self.fail_prefixes):
+            raise gcs_exceptions.ServiceUnavailable("GCS unavailable")
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def copy_blob(self, blob, destination_bucket, new_name):
+        if blob.name not in self.objects:
+            raise NotFound(blob.name)
+        self.check(new_name)
+        self.objects[new_name] = self.objects[blob.name]
+
+    def rename_blob(self, blob, new_name):
+        self.copy_blob(blob, self, new_name)
+        del self.objects[blob.name]
+        return FakeBlob(self, new_name)
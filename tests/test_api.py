@@ -0,0 +1,109 @@
+from fastapi.testclient import TestClient
+
+import app as app_module
+from controllers import GitlabController
+
+RELEASE_NOTE_REQUEST = {
+    "project_id": 1,
+    "release_tag": "v1.0",
+    "target_branch": "main",
+    "created_by": "dev",
+    "created_by_email": "dev@example.com",
+    "project_name": "demo",
+    "release_date": "2026-01-01T00:00:00",
+    "previous_release_tag": "v0.9",
+}
+
+MR_DOCUMENTATION_REQUEST = {"project_id": 1, "commit_sha": "a" * 40, "target_branch": "main", "merged_by": "dev"}
+
+# No lifespan: the tests never reach GCS
+client = TestClient(app_module.app)
+
+
+def test_malformed_json_is_rejected_with_422():
+    response = client.post(
+        "/api/v1/generate-release-note",
+        content=b'{"project_id": 1, "release_tag": ',
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 422
+    assert response.json()["message"] == "Validation error occurred"
+
+
+def test_invalid_mr_body_is_an_invalid_merge_request():
+    response = client.post(
+        "/api/v1/generate-mr-documentation",
+        content=b'{"project_id": 1, "commit_sha": ',
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["message"] == "Invalid merge request"
+
+
+def test_validator_failure_is_rejected_with_422():
+    response = client.post("/api/v1/generate-release-note", json={**RELEASE_NOTE_REQUEST, "release_tag": "  "})
+
+    assert response.status_code == 422
+    assert response.json()["details"][0]["loc"] == ["release_tag"]
+
+
+def test_empty_batch_is_rejected_with_422():
+    response = client.post("/api/v1/generate-release-note/batch", json=[])
+
+    assert response.status_code == 422
+
+
+def test_mr_documentation_batch_returns_one_result_per_request(monkeypatch):
+    async def fake_batch(requests):
+        return [{"commit_sha": request.commit_sha, "status": "success"} for request in requests]
+
+    monkeypatch.setattr(GitlabController, "process_merge_requests_batch", fake_batch)
+
+    response = client.post(
+        "/api/v1/generate-mr-documentation/batch",
+        json=[MR_DOCUMENTATION_REQUEST, {**MR_DOCUMENTATION_REQUEST, "commit_sha": "b" * 40}],
+    )
+
+    assert response.status_code == 200
+    assert [result["commit_sha"] for result in response.json()["results"]] == ["a" * 40, "b" * 40]
+
+
+def test_mr_documentation_batch_over_the_limit_is_an_invalid_merge_request():
+    batch = [MR_DOCUMENTATION_REQUEST] * (GitlabController.MAX_BATCH_SIZE + 1)
+
+    response = client.post("/api/v1/generate-mr-documentation/batch", json=batch)
+
+    assert response.status_code == 400
+
+
+def test_release_note_batch_returns_one_result_per_request(monkeypatch):
+    async def fake_batch(requests):
+        return [{"release_tag": request.release_tag, "status": "success"} for request in requests]
+
+    monkeypatch.setattr(GitlabController, "process_release_notes_batch", fake_batch)
+
+    response = client.post(
+        "/api/v1/generate-release-note/batch",
+        json=[RELEASE_NOTE_REQUEST, {**RELEASE_NOTE_REQUEST, "release_tag": "v1.1"}],
+    )
+
+    assert response.status_code == 200
+    assert [result["release_tag"] for result in response.json()["results"]] == ["v1.0", "v1.1"]
+
+
+def test_release_note_stream_sends_the_note_as_plain_text(monkeypatch):
+    async def fake_stream(request):
+        async def chunks():
+            yield "## Release "
+            yield request.release_tag
+        return chunks()
+
+    monkeypatch.setattr(GitlabController, "stream_release_note_from_cicd", fake_stream)
+
+    response = client.post("/api/v1/generate-release-note/stream", json=RELEASE_NOTE_REQUEST)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text == "## Release v1.0"
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from llm_analysis import response_cache
+from llm_analysis.gitlab import DocumentationAnalysis_gemini as gemini
+from models.gitlab.ReleaseNoteRequest import ReleaseNoteRequest
+
+RELEASE_NOTE_REQUEST = ReleaseNoteRequest(
+    project_id=1,
+    release_tag="v1.0",
+    target_branch="main",
+    created_by="dev",
+    created_by_email="dev@example.com",
+    project_name="demo",
+    release_date="2026-01-01T00:00:00",
+    previous_release_tag="v0.9",
+)
+DOCUMENTATION = {"total_documents": 1, "formatted_text": "MR docs"}
+
+
+def _usage(prompt, candidates):
+    return SimpleNamespace(
+        prompt_token_count=prompt,
+        candidates_token_count=candidates,
+        total_token_count=prompt + candidates,
+        cached_content_token_count=0,
+    )
+
+
+class FakeModel:
+    """Stands in for a Vertex GenerativeModel; counts calls"""
+
+    def __init__(self, chunks=("Release ", "note"), usage=None):
+        self.chunks = chunks
+        self.usage = usage or _usage(100, 20)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.calls += 1
+        if not stream:
+            await asyncio.sleep(0)
+            return SimpleNamespace(text="".join(self.chunks), usage_metadata=self.usage)
+        return self._stream()
+
+    async def _stream(self):
+        for number, text in enumerate(self.chunks, 1):
+            # Gemini reports running usage on every chunk; the final one has the totals
+            usage = self.usage if number == len(self.chunks) else _usage(100, number)
+            yield SimpleNamespace(text=text, usage_metadata=usage)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache._RESPONSE_CACHE.clear()
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setitem(
+        gemini._HANDLERS,
+        ReleaseNoteRequest,
+        (gemini._release_note_prompt, lambda: model, "release_note", gemini.RELEASE_NOTE_MODEL_NAME),
+    )
+    return model
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_stream_caches_usage_from_last_chunk(model):
+    chunks = asyncio.run(_collect(gemini.stream_documentation_with_llm(DOCUMENTATION, RELEASE_NOTE_REQUEST)))
+
+    assert chunks == ["Release ", "note"]
+    key = gemini.documentation_cache_key(gemini.RELEASE_NOTE_MODEL_NAME, DOCUMENTATION, RELEASE_NOTE_REQUEST)
+    stored = response_cache._RESPONSE_CACHE[key]
+    assert stored["release_note"] == "Release note"
+    assert stored["token_usage"]["input_tokens"] == 100
+    assert stored["token_usage"]["output_tokens"] == 20
+
+
+def test_stream_replays_from_cache(model):
+    asyncio.run(_collect(gemini.stream_documentation_with_llm(DOCUMENTATION, RELEASE_NOTE_REQUEST)))
+    chunks = asyncio.run(_collect(gemini.stream_documentation_with_llm(DOCUMENTATION, RELEASE_NOTE_REQUEST)))
+
+    assert chunks == ["Release note"]
+    assert model.calls == 1
+
+
+def test_batch_generates_duplicates_once(model):
+    results = asyncio.run(gemini.generate_documentation_batch([(DOCUMENTATION, RELEASE_NOTE_REQUEST)] * 3))
+
+    assert [result["release_note"] for result in results] == ["Release note"] * 3
+    assert model.calls == 1
+    # Each duplicate is its own copy and the call's usage is counted once
+    assert len({id(result) for result in results}) == 3
+    assert sum(result["token_usage"]["total_tokens"] for result in results) == 120
+    assert [result.get("deduplicated", False) for result in results] == [False, True, True]
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from llm_analysis import response_cache
+from llm_analysis.gitlab import DocumentationAnalysis
+from llm_analysis.gitlab.DocumentationAnalysis import generate_documentation_via_batch_api
+from tests.test_groq_generation import _item
+
+
+class FakeBatches:
+    def __init__(self, statuses, output_file_id="output-file"):
+        self.statuses = list(statuses)
+        self.output_file_id = output_file_id
+        self.retrieved = 0
+        self.cancelled = False
+
+    def _batch(self, status):
+        done = status == "completed"
+        return SimpleNamespace(id="batch-1", status=status, output_file_id=self.output_file_id if done else None)
+
+    async def create(self, input_file_id, endpoint, completion_window):
+        return self._batch(self.statuses[0])
+
+    async def retrieve(self, batch_id):
+        self.retrieved += 1
+        return self._batch(self.statuses[min(self.retrieved, len(self.statuses) - 1)])
+
+    async def cancel(self, batch_id):
+        self.cancelled = True
+        return self._batch("cancelled")
+
+
+class FakeFiles:
+    def __init__(self, answer):
+        self.answer = answer
+        self.uploaded = None
+
+    async def create(self, file, purpose):
+        self.uploaded = [json.loads(line) for line in file[1].decode("utf-8").splitlines()]
+        return SimpleNamespace(id="input-file")
+
+    async def content(self, file_id):
+        lines = self.answer(self.uploaded)
+
+        async def text():
+            return "\n".join(json.dumps(line) for line in lines)
+        return SimpleNamespace(text=text)
+
+
+def _completed(custom_id, content, status_code=200):
+    body = {
+        "model": "fake-llama",
+        "choices": [{"message": {"content": content}}],
+        "usage": {"prompt_tokens": 90, "completion_tokens": 10, "total_tokens": 100},
+    }
+    return {"custom_id": custom_id, "response": {"status_code": status_code, "body": body}}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache._RESPONSE_CACHE.clear()
+
+
+@pytest.fixture
+def fallback(monkeypatch):
+    """Records the MRs sent online instead of through the batch"""
+    sent = []
+
+    async def fake_batch(items):
+        sent.extend(item[1].commit_sha for item in items)
+        return [{"mr_documentation": f"online {item[1].commit_sha}"} for item in items]
+
+    monkeypatch.setattr(DocumentationAnalysis, "generate_documentation_batch", fake_batch)
+    monkeypatch.setattr(DocumentationAnalysis, "BATCH_POLL_INITIAL", 0.01)
+    monkeypatch.setattr(DocumentationAnalysis, "BATCH_POLL_MAX", 0.01)
+    return sent
+
+
+def _use_client(monkeypatch, batches, answer):
+    client = SimpleNamespace(batches=batches, files=FakeFiles(answer))
+    monkeypatch.setattr(DocumentationAnalysis, "get_groq_client", lambda: client)
+    return client
+
+
+def test_results_are_mapped_back_by_custom_id(monkeypatch, fallback):
+    items = [_item(1), _item(2), _item(3)]
+    cached_key = DocumentationAnalysis.documentation_cache_key(DocumentationAnalysis.MODEL_NAME, *items[0])
+    response_cache.cache_response(cached_key, {"mr_documentation": "cached sha1"})
+
+    # Answered out of order, and the second MR's request failed
+    def answer(uploaded):
+        assert [line["custom_id"] for line in uploaded] == ["1", "2"]
+        return [_completed("2", "batch sha3"), _completed("1", "", status_code=500)]
+
+    client = _use_client(monkeypatch, FakeBatches(["validating", "in_progress", "completed"]), answer)
+
+    results = asyncio.run(generate_documentation_via_batch_api(items))
+
+    assert [result["mr_documentation"] for result in results] == ["cached sha1", "online sha2", "batch sha3"]
+    assert results[2]["token_usage"] == {"input_tokens": 90, "output_tokens": 10, "total_tokens": 100}
+    assert fallback == ["sha2"]
+    assert client.batches.retrieved == 2
+    assert not client.batches.cancelled
+
+
+def test_batch_past_its_deadline_is_cancelled_and_sent_online(monkeypatch, fallback):
+    client = _use_client(monkeypatch, FakeBatches(["in_progress"]), lambda uploaded: [])
+
+    results = asyncio.run(generate_documentation_via_batch_api([_item(1), _item(2)], deadline=0.05))
+
+    assert client.batches.cancelled
+    assert [result["mr_documentation"] for result in results] == ["online sha1", "online sha2"]
+
+
+def test_fully_cached_items_skip_the_batch(monkeypatch, fallback):
+    item = _item(1)
+    response_cache.cache_response(
+        DocumentationAnalysis.documentation_cache_key(DocumentationAnalysis.MODEL_NAME, *item), {"mr_documentation": "cached"}
+    )
+    monkeypatch.setattr(DocumentationAnalysis, "get_groq_client", lambda: pytest.fail("no batch expected"))
+
+    results = asyncio.run(generate_documentation_via_batch_api([item]))
+
+    assert results[0]["cache_hit"] is True
+    assert fallback == []
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+
+from exception.exceptions import DocumentationGenerationError
+from llm_analysis import response_cache
+from llm_analysis.gitlab import DocumentationAnalysis
+from llm_analysis.gitlab.DocumentationAnalysis import PACKED_MR_INSTRUCTIONS, _parse_json_array, generate_documentation_batched
+from models.gitlab.MRDocumentationRequest import MRDocumentationRequest
+
+USAGE = {"input_tokens": 900, "output_tokens": 300, "total_tokens": 1200}
+
+
+def _item(number):
+    request = MRDocumentationRequest(
+        project_id=1, commit_sha=f"sha{number}", target_branch="main", merged_by="dev", title=f"MR {number}"
+    )
+    return (f"diff for MR {number}", request, None)
+
+
+class FakeGroq:
+    """Stands in for the ChatGroq model; answers with a JSON array of documents"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = []
+
+    async def ainvoke(self, messages):
+        self.calls.append(messages)
+        return AIMessage(content=self.answer, usage_metadata=USAGE, response_metadata={"model_name": "fake-llama"})
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache._RESPONSE_CACHE.clear()
+
+
+def _use_model(monkeypatch, answer):
+    model = FakeGroq(answer)
+    monkeypatch.setattr(DocumentationAnalysis, "setup_groq_llm", lambda user: model)
+    return model
+
+
+def test_packed_call_sends_instructions_as_system_message(monkeypatch):
+    model = _use_model(monkeypatch, json.dumps(["doc 1", "doc 2"]))
+
+    results = asyncio.run(generate_documentation_batched([_item(1), _item(2)]))
+
+    system, human = model.calls[0]
+    assert isinstance(system, SystemMessage) and system.content == PACKED_MR_INSTRUCTIONS
+    assert isinstance(human, HumanMessage) and "## MR 2" in human.content
+    assert [result["mr_documentation"] for result in results] == ["doc 1", "doc 2"]
+
+
+def test_packed_usage_is_counted_once(monkeypatch):
+    _use_model(monkeypatch, json.dumps(["doc 1", "doc 2", "doc 3"]))
+
+    results = asyncio.run(generate_documentation_batched([_item(1), _item(2), _item(3)]))
+
+    assert sum(result["token_usage"]["total_tokens"] for result in results) == USAGE["total_tokens"]
+    assert all(result["batch_size"] == 3 for result in results)
+
+
+def test_unsplittable_answer_falls_back_to_one_call_per_mr(monkeypatch):
+    _use_model(monkeypatch, "not json")
+    fallback = []
+
+    async def fake_batch(items):
+        fallback.extend(items)
+        return [{"mr_documentation": f"single {item[1].commit_sha}"} for item in items]
+
+    monkeypatch.setattr(DocumentationAnalysis, "generate_documentation_batch", fake_batch)
+
+    results = asyncio.run(generate_documentation_batched([_item(1), _item(2)]))
+
+    assert len(fallback) == 2
+    assert [result["mr_documentation"] for result in results] == ["single sha1", "single sha2"]
+
+
+def test_parse_json_array_accepts_a_code_fence():
+    assert _parse_json_array('```json\n["a", "b"]\n```') == ["a", "b"]
+    assert _parse_json_array('{"a": 1}') is None
+    assert _parse_json_array("[1, 2]") is None
+
+
+def test_batch_duplicates_get_their_own_copy_without_usage(monkeypatch):
+    calls = []
+
+    async def fake_generate(formatted_llm_data, request, jira_ticket_data=None):
+        calls.append(request.commit_sha)
+        return {"mr_documentation": f"doc {request.commit_sha}", "token_usage": dict(USAGE)}
+
+    monkeypatch.setattr(DocumentationAnalysis, "generate_documentation_with_llm", fake_generate)
+
+    results = asyncio.run(DocumentationAnalysis.generate_documentation_batch([_item(1), _item(1), _item(2)]))
+
+    assert calls == ["sha1", "sha2"]
+    assert results[1] is not results[0]
+    assert results[1]["mr_documentation"] == "doc sha1"
+    assert results[1]["deduplicated"] is True
+    assert sum(result["token_usage"]["total_tokens"] for result in results) == 2 * USAGE["total_tokens"]
+
+
+def test_dropped_connection_mid_stream_is_a_generation_error(monkeypatch):
+    class DroppingChain:
+        async def astream(self, inputs):
+            yield AIMessageChunk(content="partial ")
+            raise httpx.ReadError("connection dropped")
+
+    handler = DocumentationAnalysis._HANDLERS[MRDocumentationRequest]
+    monkeypatch.setitem(DocumentationAnalysis._HANDLERS, MRDocumentationRequest, (handler[0], DroppingChain, *handler[2:]))
+    formatted_llm_data, request, jira_ticket_data = _item(1)
+
+    async def run():
+        return [chunk async for chunk in DocumentationAnalysis.stream_documentation_with_llm(formatted_llm_data, request)]
+
+    with pytest.raises(DocumentationGenerationError):
+        asyncio.run(run())
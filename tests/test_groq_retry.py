@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from tenacity import wait_fixed, wait_none
+
+from llm_analysis.gitlab import DocumentationAnalysis
+from llm_analysis.gitlab.DocumentationAnalysis import MAX_RETRY_AFTER, _WaitRetryAfter, _invoke_with_retry
+
+
+class FlakyRunnable:
+    """Fails with a transport error a set number of times, then answers"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise httpx.ConnectError("connection dropped")
+        return inputs
+
+
+def _retry_state(exc):
+    outcome = SimpleNamespace(exception=lambda: exc)
+    return SimpleNamespace(outcome=outcome)
+
+
+def _error_with_retry_after(value):
+    exc = Exception("rate limited")
+    exc.response = SimpleNamespace(headers={"retry-after": value})
+    return exc
+
+
+def test_module_imports():
+    assert DocumentationAnalysis.MR_PROMPT is not None
+    assert DocumentationAnalysis.RELEASE_NOTE_PROMPT is not None
+
+
+def test_transient_errors_are_retried():
+    runnable = FlakyRunnable(failures=2)
+    invoke = _invoke_with_retry.retry_with(wait=wait_none())
+
+    assert asyncio.run(invoke(runnable, {"x": 1})) == {"x": 1}
+    assert runnable.calls == 3
+
+
+def test_last_error_is_reraised_when_attempts_run_out():
+    runnable = FlakyRunnable(failures=10)
+    invoke = _invoke_with_retry.retry_with(wait=wait_none())
+
+    try:
+        asyncio.run(invoke(runnable, {}))
+    except httpx.ConnectError:
+        pass
+    else:
+        raise AssertionError("expected the transport error to be re-raised")
+    assert runnable.calls == 5
+
+
+def test_wait_honours_retry_after():
+    wait = _WaitRetryAfter(wait_fixed(1))
+
+    assert wait(_retry_state(_error_with_retry_after("3"))) == 3.0
+    assert wait(_retry_state(_error_with_retry_after("600"))) == MAX_RETRY_AFTER
+
+
+def test_wait_falls_back_without_retry_after():
+    wait = _WaitRetryAfter(wait_fixed(1))
+
+    assert wait(_retry_state(Exception("no response"))) == 1
+    assert wait(_retry_state(_error_with_retry_after("soon"))) == 1
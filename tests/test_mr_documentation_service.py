@@ -0,0 +1,19 @@
+from services.gitlab.MRDocumentationService import shrink_file_diff
+
+
+def test_whitespace_only_changes_are_dropped():
+    diff = "@@ -1,3 +1,3 @@\n context\n+\n-   \n+real change"
+
+    assert shrink_file_diff(diff) == "@@ -1,3 +1,3 @@\n context\n+real change"
+
+
+def test_long_diff_is_capped_with_a_note():
+    diff = "\n".join(f"+line {number}" for number in range(10))
+
+    shrunk = shrink_file_diff(diff, max_lines=4)
+
+    assert shrunk.split("\n") == ["+line 0", "+line 1", "+line 2", "+line 3", "... [6 more diff lines omitted]"]
+
+
+def test_short_diff_is_unchanged():
+    assert shrink_file_diff("+a\n-b") == "+a\n-b"
@@ -0,0 +1,62 @@
+import gzip
+
+import pytest
+
+from exception.exceptions import DuplicateDocumentationError, GCSUploadError
+from gcs_storage import MRDocumentationStorage
+from models.gitlab.MRDocumentationRequest import MRDocumentationRequest
+from tests.fake_gcs import FakeBucket
+
+SHA = "a" * 40
+DOCUMENT = f"current_release/{SHA}/{SHA}_feature.md"
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    bucket = FakeBucket()
+    monkeypatch.setattr(MRDocumentationStorage, "_ensure_bucket", lambda name: bucket)
+    return bucket
+
+
+def _request():
+    return MRDocumentationRequest(
+        project_id=1, project_name="demo", commit_sha=SHA, target_branch="main", merged_by="dev", source_branch="feature"
+    )
+
+
+def test_documentation_is_stored_gzipped_under_its_sha(bucket):
+    path = MRDocumentationStorage.upload_mr_documentation(_request(), "# Doc")
+
+    assert path == f"gs://1-demo/{DOCUMENT}"
+    assert gzip.decompress(bucket.objects[DOCUMENT]) == b"# Doc"
+
+
+def test_second_upload_of_a_sha_is_a_duplicate(bucket):
+    MRDocumentationStorage.upload_mr_documentation(_request(), "# Doc")
+
+    with pytest.raises(DuplicateDocumentationError):
+        MRDocumentationStorage.upload_mr_documentation(_request(), "# Other doc")
+
+    assert list(bucket.objects) == [DOCUMENT]
+    assert gzip.decompress(bucket.objects[DOCUMENT]) == b"# Doc"
+
+
+def test_sha_can_be_documented_again_after_its_release_moved_it(bucket):
+    MRDocumentationStorage.upload_mr_documentation(_request(), "# Doc")
+    bucket.objects[f"releases/v1.0/mr_docs/{SHA}_feature.md"] = bucket.objects.pop(DOCUMENT)
+
+    MRDocumentationStorage.upload_mr_documentation(_request(), "# Doc")
+
+    assert DOCUMENT in bucket.objects
+
+
+def test_failed_upload_leaves_nothing_behind(bucket):
+    bucket.fail_prefixes.add(DOCUMENT)
+
+    with pytest.raises(GCSUploadError):
+        MRDocumentationStorage.upload_mr_documentation(_request(), "# Doc")
+    assert not bucket.objects
+
+    bucket.fail_prefixes.clear()
+    MRDocumentationStorage.upload_mr_documentation(_request(), "# Doc")
+    assert list(bucket.objects) == [DOCUMENT]
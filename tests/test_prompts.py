@@ -0,0 +1,67 @@
+import re
+
+import pytest
+
+from llm_analysis.gitlab import DocumentationAnalysis, DocumentationAnalysis_gemini
+from tests.test_gemini_generation import DOCUMENTATION, RELEASE_NOTE_REQUEST
+from tests.test_groq_generation import _item
+
+PLACEHOLDER = re.compile(r"\{\w+\}")
+
+
+@pytest.mark.parametrize("module", [DocumentationAnalysis, DocumentationAnalysis_gemini])
+def test_release_note_instructions_stay_compact(module):
+    instructions = module.RELEASE_NOTE_INSTRUCTIONS
+
+    assert "❌" not in instructions
+    assert "✅" not in instructions
+    assert instructions.count("DO NOT INCLUDE") == 1
+    assert "\n---\n" not in instructions
+
+
+def test_release_note_instructions_match_across_providers():
+    assert (
+        DocumentationAnalysis.RELEASE_NOTE_INSTRUCTIONS.strip()
+        == DocumentationAnalysis_gemini.RELEASE_NOTE_INSTRUCTIONS.strip()
+    )
+
+
+
+def _mr_items():
+    return [_item(1), _item(2)]
+
+
+def _release_note_items():
+    other_request = RELEASE_NOTE_REQUEST.model_copy(update={"release_tag": "v2.0"})
+    other_documentation = {"total_documents": 2, "formatted_text": "Other MR docs"}
+    return [(DOCUMENTATION, RELEASE_NOTE_REQUEST, None), (other_documentation, other_request, None)]
+
+
+@pytest.mark.parametrize("prompt, build_inputs, items", [
+    (DocumentationAnalysis.MR_PROMPT, DocumentationAnalysis._mr_inputs, _mr_items()),
+    (DocumentationAnalysis.RELEASE_NOTE_PROMPT, DocumentationAnalysis._release_note_inputs, _release_note_items()),
+], ids=["mr", "release_note"])
+def test_groq_system_message_is_static(prompt, build_inputs, items):
+    rendered = [prompt.format_messages(**build_inputs(request, data, jira)) for data, request, jira in items]
+    (first_system, first_human), (second_system, second_human) = rendered
+
+    # Only the human message varies, so the system prefix can be cached
+    assert first_system.content == second_system.content
+    assert not PLACEHOLDER.search(first_system.content)
+    assert first_human.content != second_human.content
+
+
+@pytest.mark.parametrize("instructions, render, items", [
+    (DocumentationAnalysis_gemini.MR_INSTRUCTIONS, DocumentationAnalysis_gemini._mr_prompt, _mr_items()),
+    (
+        DocumentationAnalysis_gemini.RELEASE_NOTE_INSTRUCTIONS,
+        DocumentationAnalysis_gemini._release_note_prompt,
+        _release_note_items(),
+    ),
+], ids=["mr", "release_note"])
+def test_gemini_system_instruction_is_static(instructions, render, items):
+    first, second = [render(request, data, jira) for data, request, jira in items]
+
+    assert not PLACEHOLDER.search(instructions)
+    assert instructions not in first
+    assert first != second
@@ -0,0 +1,48 @@
+import asyncio
+
+from exception.exceptions import MRNotFoundForReleaseError
+from services.gitlab import ReleaseNoteService
+from tests.test_gemini_generation import DOCUMENTATION, RELEASE_NOTE_REQUEST
+
+
+def test_streamed_note_holds_llm_concurrency_and_uploads_once_complete(monkeypatch):
+    held = []
+    uploads = []
+
+    async def fake_stream(documentation, request):
+        held.append(ReleaseNoteService.LLM_CONCURRENCY._value)
+        yield "Release "
+        yield "note"
+
+    async def fake_upload(request, content, mr_sha, blob_names):
+        uploads.append((content, mr_sha, blob_names))
+
+    monkeypatch.setattr(ReleaseNoteService, "stream_documentation_with_llm", fake_stream)
+    monkeypatch.setattr(ReleaseNoteService, "upload_release_note", fake_upload)
+    free = ReleaseNoteService.LLM_CONCURRENCY._value
+
+    async def run():
+        documentation = {**DOCUMENTATION, "blob_names": ["a.md"]}
+        stream = ReleaseNoteService._stream_and_upload_release_note(RELEASE_NOTE_REQUEST, {"sha1"}, documentation)
+        return [chunk async for chunk in stream]
+
+    assert asyncio.run(run()) == ["Release ", "note"]
+    assert held == [free - 1]
+    assert ReleaseNoteService.LLM_CONCURRENCY._value == free
+    assert uploads == [("Release note", ["sha1"], ["a.md"])]
+
+
+def test_batch_reports_failures_per_release(monkeypatch):
+    async def fake_process(request):
+        if request.release_tag == "v2.0":
+            raise MRNotFoundForReleaseError("No MR found for release v2.0")
+        return {"status": "success", "release_tag": request.release_tag}
+
+    monkeypatch.setattr(ReleaseNoteService, "process_release_note_from_cicd", fake_process)
+    requests = [RELEASE_NOTE_REQUEST, RELEASE_NOTE_REQUEST.model_copy(update={"release_tag": "v2.0"})]
+
+    results = asyncio.run(ReleaseNoteService.process_release_notes_batch(requests))
+
+    assert results[0] == {"status": "success", "release_tag": "v1.0"}
+    assert results[1]["status"] == "error"
+    assert results[1]["status_code"] == 404
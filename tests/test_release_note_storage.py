@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from exception.exceptions import GCSUploadError
+from gcs_storage import ReleaseNoteStorage
+from gcs_storage.ReleaseNoteStorage import (
+    format_for_llm,
+    get_MR_documentation_sha_from_bucket,
+    move_mr_documentation,
+    upload_release_note,
+)
+from gcs_storage.Utility import invalidate_documents_sha
+from tests.fake_gcs import FakeBucket
+from tests.test_gemini_generation import RELEASE_NOTE_REQUEST
+
+SHA_A, SHA_B, SHA_C = "a" * 40, "b" * 40, "c" * 40
+
+
+def _doc_name(sha):
+    return f"current_release/{sha}/20260101_000000_{sha}_feature.md"
+
+
+def _document(sha, content, token_count=10):
+    name = _doc_name(sha)
+    return {"sha": sha, "path": name, "filename": name.rpartition("/")[2], "content": content, "token_count": token_count}
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    bucket = FakeBucket(objects={_doc_name(sha): f"doc {sha[0]}" for sha in (SHA_A, SHA_B, SHA_C)})
+    monkeypatch.setattr(ReleaseNoteStorage, "get_storage_client", lambda: bucket.client)
+    monkeypatch.setattr(ReleaseNoteStorage, "bucket_exists", lambda bucket: True)
+    return bucket
+
+
+def test_format_for_llm_sends_identical_documents_once():
+    formatted = format_for_llm([
+        _document(SHA_A, "Adds  caching\n"),
+        _document(SHA_B, "Adds caching"),
+        _document(SHA_C, "Fixes login"),
+    ])
+
+    assert formatted["formatted_text"].count("## Document") == 2
+    assert f"**SHA:** {SHA_A}, {SHA_B}" in formatted["formatted_text"]
+    assert formatted["total_documents"] == 3
+    assert formatted["blob_names"] == [_doc_name(SHA_A), _doc_name(SHA_B), _doc_name(SHA_C)]
+    assert formatted["estimated_tokens"] == 20
+
+
+def test_format_for_llm_handles_no_documents():
+    assert format_for_llm([])["total_documents"] == 0
+
+
+def test_move_only_takes_the_release_shas(bucket):
+    moved = asyncio.run(move_mr_documentation(
+        bucket.name, [_doc_name(SHA_A), _doc_name(SHA_B), _doc_name(SHA_C)], "releases/v1.0/mr_docs", [SHA_A, SHA_B]
+    ))
+
+    assert moved == {
+        _doc_name(SHA_A): f"releases/v1.0/mr_docs/20260101_000000_{SHA_A}_feature.md",
+        _doc_name(SHA_B): f"releases/v1.0/mr_docs/20260101_000000_{SHA_B}_feature.md",
+    }
+    assert sorted(bucket.objects) == sorted([_doc_name(SHA_C), *moved.values()])
+
+
+def test_move_reports_blobs_another_process_already_moved(bucket):
+    destination = f"releases/v1.0/mr_docs/20260101_000000_{SHA_A}_feature.md"
+    bucket.objects[destination] = bucket.objects.pop(_doc_name(SHA_A))
+
+    moved = asyncio.run(move_mr_documentation(
+        bucket.name, [_doc_name(SHA_A), _doc_name(SHA_B)], "releases/v1.0/mr_docs", [SHA_A, SHA_B]
+    ))
+
+    assert set(moved) == {_doc_name(SHA_A), _doc_name(SHA_B)}
+    assert not any(name.startswith(f"current_release/{SHA_B}") for name in bucket.objects)
+
+
+def test_failed_note_upload_puts_the_documents_back(bucket, monkeypatch):
+    monkeypatch.setattr(ReleaseNoteStorage, "blob_timestamp", lambda: "20260102_000000")
+    # Only the note itself fails; the document moves under mr_docs/ succeed and are rolled back
+    bucket.fail_prefixes.add("releases/v1.0/20260102_000000")
+    before = dict(bucket.objects)
+
+    with pytest.raises(GCSUploadError):
+        asyncio.run(upload_release_note(RELEASE_NOTE_REQUEST, "Release note", [SHA_A, SHA_B], [_doc_name(SHA_A), _doc_name(SHA_B)]))
+
+    assert bucket.objects == before
+
+
+def test_release_note_upload_moves_the_documents(bucket):
+    path = asyncio.run(upload_release_note(RELEASE_NOTE_REQUEST, "Release note", [SHA_A], [_doc_name(SHA_A)]))
+
+    note_path = path.removeprefix(f"gs://{bucket.name}/")
+    assert bucket.objects[note_path] == "Release note"
+    assert _doc_name(SHA_A) not in bucket.objects
+    assert f"releases/v1.0/mr_docs/20260101_000000_{SHA_A}_feature.md" in bucket.objects
+
+
+def test_concurrent_lookups_share_one_listing_and_release_the_lock(bucket, monkeypatch):
+    calls = []
+
+    async def list_documented_sha(bucket):
+        calls.append(bucket.name)
+        await asyncio.sleep(0.01)
+        return {SHA_A: [_doc_name(SHA_A)]}
+
+    async def lookup_twice():
+        return await asyncio.gather(*(get_MR_documentation_sha_from_bucket(RELEASE_NOTE_REQUEST) for _ in range(2)))
+
+    monkeypatch.setattr(ReleaseNoteStorage, "_list_documented_sha", list_documented_sha)
+    bucket_name = f"{RELEASE_NOTE_REQUEST.project_id}-{RELEASE_NOTE_REQUEST.project_name}"
+    invalidate_documents_sha(bucket_name)
+    try:
+        results = asyncio.run(lookup_twice())
+    finally:
+        invalidate_documents_sha(bucket_name)
+
+    assert len(calls) == 1
+    assert [mr_sha for _, mr_sha in results] == [{SHA_A: [_doc_name(SHA_A)]}] * 2
+    assert ReleaseNoteStorage._SHA_LOOKUP_LOCKS == {}
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from llm_analysis import response_cache
+from llm_analysis.response_cache import (
+    _IN_FLIGHT, cache_response, canonical_labels, canonical_text, documentation_cache_key, get_cached_response, single_flight
+)
+from models.gitlab.MRDocumentationRequest import MRDocumentationRequest
+
+USAGE = {"input_tokens": 90, "output_tokens": 10, "total_tokens": 100}
+NO_TOKENS = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache._RESPONSE_CACHE.clear()
+
+
+class Generation:
+    """A generate() callable whose result the test releases explicitly"""
+
+    def __init__(self, result=None, error=None):
+        self.result = result or {"mr_documentation": "doc", "token_usage": USAGE}
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_single_flight_shares_one_call_between_identical_requests():
+    async def run():
+        generate = Generation()
+        tasks = [asyncio.create_task(single_flight("key", generate)) for _ in range(3)]
+        await asyncio.sleep(0)
+        generate.release.set()
+        return generate, await asyncio.gather(*tasks)
+
+    generate, results = asyncio.run(run())
+
+    assert generate.calls == 1
+    assert results[0] == {"mr_documentation": "doc", "token_usage": USAGE}
+    assert results[1:] == [{"mr_documentation": "doc", "token_usage": NO_TOKENS, "deduplicated": True}] * 2
+    assert not _IN_FLIGHT
+
+
+def test_single_flight_raises_the_error_for_every_waiter():
+    async def run():
+        generate = Generation(error=ValueError("model failed"))
+        tasks = [asyncio.create_task(single_flight("key", generate)) for _ in range(2)]
+        await asyncio.sleep(0)
+        generate.release.set()
+        return generate, await asyncio.gather(*tasks, return_exceptions=True)
+
+    generate, outcomes = asyncio.run(run())
+
+    assert generate.calls == 1
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert not _IN_FLIGHT
+
+
+def test_single_flight_waiter_takes_over_when_the_leader_is_cancelled():
+    async def run():
+        generate = Generation()
+        leader = asyncio.create_task(single_flight("key", generate))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(single_flight("key", generate)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        await asyncio.sleep(0)
+        generate.release.set()
+        return generate, await asyncio.gather(*waiters)
+
+    generate, results = asyncio.run(run())
+
+    # One waiter re-ran the call; the other shared it
+    assert generate.calls == 2
+    assert sorted(result.get("deduplicated", False) for result in results) == [False, True]
+    assert not _IN_FLIGHT
+
+
+def _mr_request(**fields):
+    return MRDocumentationRequest(
+        **{"project_id": 1, "commit_sha": "a" * 40, "target_branch": "main", "merged_by": "dev", **fields}
+    )
+
+
+def test_canonical_text_normalises_and_strips():
+    assert canonical_text("  Café \n") == "Café"
+    assert canonical_text(None) == ""
+
+
+def test_canonical_labels_are_sorted():
+    assert canonical_labels([" ui", "backend "]) == "backend, ui"
+    assert canonical_labels(None) == ""
+
+
+def test_cache_key_ignores_cosmetic_metadata_differences():
+    first = documentation_cache_key("model", "diff", _mr_request(title="Add cache", labels=["b", "a"]))
+    second = documentation_cache_key("model", "diff", _mr_request(title=" Add  cache", labels=["a", "b"]))
+
+    assert first == second
+
+
+def test_cache_key_keeps_diff_whitespace():
+    request = _mr_request(title="Reindent")
+
+    assert documentation_cache_key("model", "+    x = 1", request) != documentation_cache_key("model", "+  x = 1", request)
+    assert documentation_cache_key("model", "+a\n+b", request) != documentation_cache_key("model", "+a +b", request)
+
+
+def test_cache_key_depends_on_model_and_content():
+    request = _mr_request(title="Add cache")
+    key = documentation_cache_key("model", "diff", request)
+
+    assert documentation_cache_key("other-model", "diff", request) != key
+    assert documentation_cache_key("model", "other diff", request) != key
+
+
+def test_cache_hit_reports_no_token_usage():
+    key = documentation_cache_key("model", "diff", _mr_request(title="Cache hit"))
+    assert get_cached_response(key) is None
+
+    cache_response(key, {"mr_documentation": "doc", "token_usage": {"input_tokens": 5, "output_tokens": 5, "total_tokens": 10}})
+
+    assert get_cached_response(key) == {
+        "mr_documentation": "doc",
+        "token_usage": {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+        "cache_hit": True,
+    }
@@ -0,0 +1,28 @@
+from llm_analysis.token_budget import count_tokens, fit_to_token_budget
+
+
+def test_text_within_budget_is_unchanged():
+    assert fit_to_token_budget("short diff", 100) == "short diff"
+    assert fit_to_token_budget("", 10) == ""
+
+
+def test_long_text_keeps_head_and_tail():
+    text = " ".join(f"line{number}" for number in range(2000))
+
+    trimmed = fit_to_token_budget(text, 100)
+
+    assert trimmed.startswith("line0 ")
+    assert trimmed.endswith("line1999")
+    assert "...[truncated" in trimmed
+    assert count_tokens(trimmed) < count_tokens(text)
+
+
+def test_trimming_is_deterministic():
+    text = "x = 1\n" * 5000
+
+    assert fit_to_token_budget(text, 200) == fit_to_token_budget(text, 200)
+
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("hello world") == 2